@@ -0,0 +1,219 @@
+"""
+SQLite-backed store of every article ever scraped.
+
+Articles are deduplicated on a hash of their normalized headline, so each
+scrape only inserts (and scores) the headlines that were not seen before and
+refreshes the last-seen time of the others. Sentiment scores are stored with
+the article so analyses over days of history never rescore old headlines.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import sentiment
+from keyword_engine import KeywordCounter
+
+DB_PATH = os.environ.get(
+    'NEWS_ANALYZER_DB',
+    os.path.join(os.path.expanduser('~'), '.news_analyzer_articles.db')
+)
+
+# SQLite limits the number of parameters in one statement
+_BATCH = 500
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    headline_hash BLOB NOT NULL UNIQUE,
+    headline TEXT NOT NULL,
+    summary TEXT,
+    link TEXT,
+    source TEXT,
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL,
+    sentiment TEXT
+);
+CREATE INDEX IF NOT EXISTS articles_first_seen ON articles (first_seen);
+CREATE INDEX IF NOT EXISTS articles_last_seen ON articles (last_seen);
+CREATE INDEX IF NOT EXISTS articles_unscored ON articles (id) WHERE sentiment IS NULL;
+"""
+
+
+def normalize_headline(headline):
+    """Case-fold and collapse whitespace so trivial variations dedupe together."""
+    return ' '.join(headline.casefold().split())
+
+
+def headline_hash(headline):
+    return hashlib.blake2b(normalize_headline(headline).encode('utf-8'), digest_size=16).digest()
+
+
+def sentiment_text(article):
+    """Text whose sentiment is stored: the summary if there is one, else the headline."""
+    return article['summary'] or article['headline']
+
+
+class ArticleStore:
+    """Persistent, deduplicated collection of scraped articles."""
+
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        # Scrapes may finish on worker threads, so the connection is shared under a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._conn:
+            self._conn.executescript(SCHEMA)
+        self._keywords = None
+        self._stories = None
+        # Held while the running keyword counts and story clusters are built
+        # from the history or fed by an ingest, so no scrape slips in between
+        self._index_lock = threading.Lock()
+
+    def close(self):
+        self._conn.close()
+
+    def _existing_hashes(self, hashes):
+        existing = set()
+        for i in range(0, len(hashes), _BATCH):
+            batch = hashes[i:i + _BATCH]
+            placeholders = ','.join('?' * len(batch))
+            rows = self._conn.execute(
+                f"SELECT headline_hash FROM articles WHERE headline_hash IN ({placeholders})", batch)
+            existing.update(row[0] for row in rows)
+        return existing
+
+    def ingest(self, articles, now=None):
+        """
+        Record a scrape. Returns the articles that were not in the store yet,
+        in order and without duplicates; those already stored only get their
+        last-seen time refreshed.
+        """
+        now = now or time.time()
+        by_hash = {}
+        for article in articles:
+            if article['headline']:
+                by_hash.setdefault(headline_hash(article['headline']), article)
+
+        with self._index_lock:
+            with self._lock, self._conn:
+                existing = self._existing_hashes(list(by_hash))
+                new = {h: a for h, a in by_hash.items() if h not in existing}
+                self._conn.executemany(
+                    "UPDATE articles SET last_seen = ? WHERE headline_hash = ?",
+                    [(now, h) for h in existing])
+                self._conn.executemany(
+                    "INSERT INTO articles (headline_hash, headline, summary, link, source, first_seen, last_seen) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(h, a['headline'], a['summary'], a.get('link'), a.get('source'), now, now)
+                     for h, a in new.items()])
+
+            new_articles = list(new.values())
+            if self._keywords is not None:
+                for article in new_articles:
+                    self._keywords.add(article, now)
+            if self._stories is not None:
+                self._stories.add_many(new_articles)
+        return new_articles
+
+    def score_new(self):
+        """
+        Score and store the sentiment of every article that has none yet:
+        the freshly ingested ones, and any left unscored because an earlier
+        attempt failed. Returns the number of articles scored.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, headline, summary FROM articles WHERE sentiment IS NULL").fetchall()
+        if not rows:
+            return 0
+        scores = sentiment.score_many([row['summary'] or row['headline'] for row in rows])
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE articles SET sentiment = ? WHERE id = ?",
+                [(json.dumps(s), row['id']) for row, s in zip(rows, scores)])
+        return len(rows)
+
+    def load(self, since=None, sources=None):
+        """
+        Return the stored articles first seen at or after since (a timestamp),
+        optionally limited to some sources, oldest first. Their stored
+        sentiment is fed to the sentiment cache so it is not computed again.
+        """
+        query = "SELECT headline, summary, link, source, first_seen, last_seen, sentiment FROM articles"
+        conditions, params = [], []
+        if since is not None:
+            conditions.append("first_seen >= ?")
+            params.append(since)
+        if sources:
+            conditions.append(f"source IN ({','.join('?' * len(sources))})")
+            params.extend(sources)
+        if conditions:
+            query += " WHERE " + " AND ".join(conditions)
+        query += " ORDER BY first_seen, id"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        articles = []
+        for row in rows:
+            article = {
+                'headline': row['headline'],
+                'summary': row['summary'],
+                'link': row['link'],
+                'source': row['source'],
+                'first_seen': row['first_seen'],
+                'last_seen': row['last_seen'],
+            }
+            if row['sentiment']:
+                sentiment.remember(sentiment_text(article), json.loads(row['sentiment']))
+            articles.append(article)
+        return articles
+
+    def keyword_counter(self):
+        """
+        Return running keyword counts over the whole history, bucketed by
+        first-seen time like load(since=...) filters. The stored articles are
+        counted once; after that every ingest adds only its new articles.
+        The counter may be queried from any thread while scrapes are ingested.
+        """
+        with self._index_lock:
+            if self._keywords is None:
+                counter = KeywordCounter(dedupe=True)
+                counter.add_many(self.load())
+                self._keywords = counter
+            return self._keywords
+
+    def story_clusterer(self):
+        """
+        Return the clusters of near-duplicate headlines over the whole
+        history. Like keyword_counter, the stored articles are clustered once
+        and every ingest adds only its new articles.
+        """
+        with self._index_lock:
+            if self._stories is None:
+                from story_clusters import cluster_articles
+                self._stories = cluster_articles(self.load())
+            return self._stories
+
+    def count(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM articles").fetchone()[0]
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the shared store at DB_PATH, opening it on first use."""
+    global _store
+    # Threads opening the store at once must share it, or one's keyword
+    # counter and story clusterer would miss the other's ingests
+    with _store_lock:
+        if _store is None:
+            _store = ArticleStore()
+    return _store
@@ -0,0 +1,83 @@
+"""
+Compare the HTML parse backends on the saved front page of each site.
+
+For every installed backend the page is parsed twice: as a full document and
+restricted to the elements the site's selectors start from. Both must yield
+the same articles as a full html.parser parse; the script exits non-zero if
+any does not (tests/test_site_registry.py checks the same). selectolax only
+does targeted parses (full ones go through another backend), so it has no
+full row; sites that cannot be parsed partially have no targeted rows.
+
+    python benchmarks/bench_parse.py [--repeat N] [--json out.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixtures import SCRAPER_FIXTURES, fixture_kind, load_fixture, load_sites  # noqa: E402
+from parse_backend import available_backends, parse_page  # noqa: E402
+from site_registry import compile_site, extract_articles  # noqa: E402
+
+
+def time_parse(spec, compiled, content, backend, targeted, repeat):
+    """Return (median seconds, articles) for parsing and extracting a page."""
+    roots = compiled[2] if targeted else None
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        soup = parse_page(content, roots, backend)
+        articles = extract_articles(spec, soup, compiled)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), articles
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the HTML parse backends.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    disagreements = 0
+    print(f"{'site':<14}{'backend':<13}{'mode':<10}{'ms':>9}{'articles':>10}")
+    for spec in load_sites():
+        content = load_fixture(SCRAPER_FIXTURES[spec['name']])
+        compiled = compile_site(spec)
+        _, expected = time_parse(spec, compiled, content, 'html.parser', False, 1)
+
+        for backend in available_backends():
+            for targeted in (False, True):
+                if (backend == 'selectolax' and not targeted) or (targeted and compiled[2] is None):
+                    continue
+                seconds, articles = time_parse(spec, compiled, content, backend, targeted, args.repeat)
+                mode = 'targeted' if targeted else 'full'
+                if articles != expected:
+                    disagreements += 1
+                    print(f"ERROR: {backend}/{mode} disagrees with html.parser on {spec['name']}")
+                results.append({
+                    'site': SCRAPER_FIXTURES[spec['name']],
+                    'backend': backend,
+                    'mode': mode,
+                    'bytes': len(content),
+                    'fixture': fixture_kind(SCRAPER_FIXTURES[spec['name']]),
+                    'median_ms': round(seconds * 1000, 3),
+                    'articles': len(articles),
+                })
+                print(f"{SCRAPER_FIXTURES[spec['name']]:<14}{backend:<13}{mode:<10}"
+                      f"{seconds * 1000:>9.2f}{len(articles):>10}")
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    if disagreements:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
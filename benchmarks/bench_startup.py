@@ -0,0 +1,125 @@
+"""
+Measure how long the CLI and GUI modules take to import.
+
+Each entry point is imported in a fresh interpreter, so nothing is cached
+between runs. The script also reports the slowest imports (from
+python -X importtime) and fails if a heavy module that should only load on
+first use was imported at startup, or if an import is slower than --max-ms.
+
+    python benchmarks/bench_startup.py [--repeat N] [--max-ms MS] [--json out.json]
+"""
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Imported by each entry point, in a fresh interpreter
+ENTRY_POINTS = {
+    'cli': "import newsanalyzerCLI",
+    # The GUI script's upper case extension needs an explicit loader
+    'gui': ("import importlib.machinery, importlib.util\n"
+            "loader = importlib.machinery.SourceFileLoader('EGGnewsUI', 'EGGnewsUI.PY')\n"
+            "spec = importlib.util.spec_from_loader('EGGnewsUI', loader)\n"
+            "loader.exec_module(importlib.util.module_from_spec(spec))"),
+}
+
+# Modules that must only be imported when their feature is first used
+DEFERRED = ('nltk', 'matplotlib', 'wordcloud', 'numpy')
+
+PROBE = """
+import sys, time
+preloaded = set(sys.modules)
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+print(repr((elapsed, sorted(m for m in {deferred!r} if m in sys.modules), sorted(preloaded))))
+"""
+
+
+def run_probe(code, importtime=False):
+    """
+    Import an entry point in a new interpreter. Returns the seconds it took,
+    the deferred modules it loaded, the modules loaded before it and stderr.
+    """
+    command = [sys.executable]
+    if importtime:
+        command += ['-X', 'importtime']
+    command += ['-c', PROBE.format(code=code, deferred=DEFERRED)]
+    # Keep the NLTK download switch off, as on an offline machine
+    env = dict(os.environ, NEWS_ANALYZER_NLTK_DOWNLOAD='')
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    seconds, loaded, preloaded = ast.literal_eval(result.stdout.strip().splitlines()[-1])
+    return seconds, loaded, preloaded, result.stderr
+
+
+def slowest_imports(importtime_log, preloaded, count):
+    """
+    Return the count modules imported directly by the entry point with the
+    largest cumulative import time, as (name, ms).
+    """
+    imports = []
+    for line in importtime_log.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        module = name.strip()
+        if module in preloaded or module in ('newsanalyzerCLI', 'EGGnewsUI'):
+            continue
+        imports.append((len(name) - len(name.lstrip()), module, int(cumulative) / 1000))
+    if not imports:
+        return []
+    # The shallowest nesting left is what the entry point itself imported
+    depth = min(item[0] for item in imports)
+    direct = [(module, ms) for d, module, ms in imports if d == depth]
+    return sorted(direct, key=lambda item: item[1], reverse=True)[:count]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the startup time of the entry points.")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--max-ms', type=float, help="fail if a median import takes longer than this")
+    parser.add_argument('--top', type=int, default=8, help="number of slowest imports to list")
+    parser.add_argument('--json', help="write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    failed = False
+    for name, code in ENTRY_POINTS.items():
+        timings = []
+        loaded = []
+        for _ in range(args.repeat):
+            seconds, loaded, _, _ = run_probe(code)
+            timings.append(seconds)
+        _, _, preloaded, log = run_probe(code, importtime=True)
+        median_ms = statistics.median(timings) * 1000
+
+        print(f"{name}: median {median_ms:.1f} ms, min {min(timings) * 1000:.1f} ms")
+        for module, ms in slowest_imports(log, set(preloaded), args.top):
+            print(f"    {module:<28}{ms:>9.1f} ms")
+        if loaded:
+            print(f"    FAIL: imported at startup: {', '.join(loaded)}")
+            failed = True
+        if args.max_ms is not None and median_ms > args.max_ms:
+            print(f"    FAIL: slower than {args.max_ms:.0f} ms")
+            failed = True
+
+        results.append({
+            'entry_point': name,
+            'median_ms': round(median_ms, 3),
+            'min_ms': round(min(timings) * 1000, 3),
+            'deferred_loaded': loaded,
+        })
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
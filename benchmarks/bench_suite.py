@@ -0,0 +1,317 @@
+"""
+Offline benchmark suite for the whole pipeline.
+
+Times each stage and reports p50/p95 latency and throughput:
+
+    fetch       every site's fixture page from a local mock server, with a cold
+                cache and again revalidated (304), with optional latency/failures
+    parse       every site's page with the configured parse backend
+    tokenize    synthetic corpora of --sizes headlines (100 to 1M by default)
+    sentiment   the same corpora, with an empty score cache
+    keywords    the same corpora fed to a KeywordCounter, plus the top-k query
+    clusters    the same corpora clustered into stories by a StoryClusterer
+    wordcloud   the corpora up to --wordcloud-max headlines
+
+Corpus stages are split into about 100 batches; latency is per batch and
+throughput is headlines per second. Stages whose NLTK data is not installed
+are reported as skipped. Fetch and parse results record whether they ran on
+recorded or synthetic pages ("fixture", see fixtures.py). Results go to
+--json; --compare checks them against an earlier file and exits non-zero on a
+regression.
+
+    python benchmarks/bench_suite.py [--sizes N ...] [--stages STAGE ...] [--repeat N]
+        [--latency S] [--jitter S] [--failure-rate F] [--json out.json]
+        [--compare baseline.json] [--threshold 0.2]
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# Keep the benchmark's pages out of the real response cache
+os.environ['NEWS_ANALYZER_CACHE_DIR'] = tempfile.mkdtemp(prefix='news_analyzer_bench_')
+
+import requests  # noqa: E402
+
+import fetcher  # noqa: E402
+from fixtures import SCRAPER_FIXTURES, fixture_kind, load_fixture, load_sites, synthetic_headlines  # noqa: E402
+from mock_server import MockNewsServer  # noqa: E402
+from site_registry import compile_site, extract_articles, parse_site_page  # noqa: E402
+
+STAGES = ('fetch', 'parse', 'tokenize', 'sentiment', 'keywords', 'clusters', 'wordcloud')
+DEFAULT_SIZES = (100, 1_000, 10_000, 100_000, 1_000_000)
+
+# Number of batches a corpus is split into for the latency percentiles
+SAMPLES = 100
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a list of numbers."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summarize(stage, variant, size, timings, items, unit, **extra):
+    """Result record for a list of per-sample timings (seconds) covering items units."""
+    total = sum(timings)
+    result = {
+        'stage': stage,
+        'variant': variant,
+        'size': size,
+        'samples': len(timings),
+        'p50_ms': round(percentile(timings, 50) * 1000, 3),
+        'p95_ms': round(percentile(timings, 95) * 1000, 3),
+        'throughput': round(items / total, 1) if total else None,
+        'unit': f"{unit}/s",
+    }
+    result.update(extra)
+    return result
+
+
+def skipped(stage, size, reason):
+    return {'stage': stage, 'variant': None, 'size': size, 'skipped': reason}
+
+
+def batches(items, samples=SAMPLES):
+    size = max(1, math.ceil(len(items) / samples))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def time_batches(fn, items):
+    """Call fn on each batch of items; return the per-batch timings."""
+    timings = []
+    for batch in batches(items):
+        start = time.perf_counter()
+        fn(batch)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_fetch(sites, args):
+    results = []
+    server = MockNewsServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                            failure_mode=args.failure_mode)
+    with server:
+        fetcher.set_url_rewriter(server.rewrite)
+        try:
+            for variant in ('cold', 'revalidate'):
+                timings, failures, size = [], 0, 0
+                for _ in range(args.repeat):
+                    if variant == 'cold':
+                        fetcher.get_cache().clear()
+                    for spec in sites:
+                        start = time.perf_counter()
+                        try:
+                            size += len(fetcher.fetch(spec['fetch_url']).content)
+                        except requests.RequestException:
+                            failures += 1
+                        timings.append(time.perf_counter() - start)
+                results.append(summarize('fetch', variant, len(sites), timings, len(timings), 'pages',
+                                         failures=failures, bytes=size))
+        finally:
+            fetcher.set_url_rewriter(None)
+    kinds = {fixture_kind(SCRAPER_FIXTURES[spec['name']]) for spec in sites}
+    kind = kinds.pop() if len(kinds) == 1 else 'mixed'
+    for result in results:
+        result['fixture'] = kind
+    results[0]['server_requests'] = server.requests
+    results[0]['injected_failures'] = server.failures
+    return results
+
+
+def bench_parse(sites, args):
+    results = []
+    for spec in sites:
+        content = load_fixture(SCRAPER_FIXTURES[spec['name']])
+        compiled = compile_site(spec)
+        timings = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            articles = extract_articles(spec, parse_site_page(spec, content, compiled), compiled)
+            timings.append(time.perf_counter() - start)
+        results.append(summarize('parse', SCRAPER_FIXTURES[spec['name']], 1, timings, len(timings),
+                                 'pages', articles=len(articles), bytes=len(content),
+                                 fixture=fixture_kind(SCRAPER_FIXTURES[spec['name']])))
+    return results
+
+
+def bench_tokenize(headlines):
+    from text_processing import process_text
+
+    # Load NLTK and its data before timing
+    process_text(headlines[0])
+    timings = time_batches(lambda batch: [process_text(text) for text in batch], headlines)
+    return summarize('tokenize', None, len(headlines), timings, len(headlines), 'headlines')
+
+
+def bench_sentiment(headlines):
+    import sentiment
+
+    # Load the analyzer, then start with an empty cache so every headline is really scored
+    sentiment.get_analyzer()
+    sentiment._cache.clear()
+    timings = time_batches(sentiment.score_many, headlines)
+    return summarize('sentiment', None, len(headlines), timings, len(headlines), 'headlines')
+
+
+def bench_keywords(headlines):
+    from keyword_engine import KeywordCounter
+    from text_processing import _tokenize_cached, process_text
+
+    process_text(headlines[0])
+    _tokenize_cached.cache_clear()
+    articles = [{'headline': headline, 'summary': None} for headline in headlines]
+    counter = KeywordCounter()
+    timings = time_batches(counter.add_many, articles)
+    start = time.perf_counter()
+    counter.top_k(10)
+    top_k_ms = (time.perf_counter() - start) * 1000
+    return summarize('keywords', None, len(headlines), timings, len(headlines), 'headlines',
+                     top_k_ms=round(top_k_ms, 3))
+
+
+def bench_clusters(headlines):
+    from story_clusters import StoryClusterer
+
+    articles = [{'headline': headline, 'summary': None, 'source': 'bench'} for headline in headlines]
+    clusterer = StoryClusterer()
+    timings = time_batches(clusterer.add_many, articles)
+    return summarize('clusters', None, len(headlines), timings, len(headlines), 'headlines',
+                     stories=len(clusterer.clusters))
+
+
+def bench_wordcloud(headlines, repeat):
+    from wordcloud import WordCloud
+    from text_processing import all_tokens
+
+    text = ' '.join(all_tokens([{'headline': headline, 'summary': None} for headline in headlines]))
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        WordCloud(width=800, height=400, background_color='white').generate(text)
+        timings.append(time.perf_counter() - start)
+    return summarize('wordcloud', None, len(headlines), timings, len(headlines) * repeat, 'headlines')
+
+
+def run(args):
+    results = []
+    if 'fetch' in args.stages or 'parse' in args.stages:
+        sites = [spec for spec in load_sites() if spec['name'] in SCRAPER_FIXTURES]
+        if 'fetch' in args.stages:
+            results.extend(bench_fetch(sites, args))
+        if 'parse' in args.stages:
+            results.extend(bench_parse(sites, args))
+
+    corpus_stages = [stage for stage in ('tokenize', 'sentiment', 'keywords', 'clusters', 'wordcloud')
+                     if stage in args.stages]
+    for size in args.sizes if corpus_stages else ():
+        headlines = synthetic_headlines(size)
+        for stage in corpus_stages:
+            if stage == 'wordcloud' and size > args.wordcloud_max:
+                continue
+            try:
+                if stage == 'tokenize':
+                    results.append(bench_tokenize(headlines))
+                elif stage == 'sentiment':
+                    results.append(bench_sentiment(headlines))
+                elif stage == 'keywords':
+                    results.append(bench_keywords(headlines))
+                elif stage == 'clusters':
+                    results.append(bench_clusters(headlines))
+                else:
+                    results.append(bench_wordcloud(headlines, args.repeat))
+            except LookupError as e:
+                # NLTK data is missing
+                results.append(skipped(stage, size, str(e).split('. ')[0]))
+    return results
+
+
+def print_results(results):
+    print(f"{'stage':<11}{'variant':<13}{'size':>9}{'p50 ms':>11}{'p95 ms':>11}{'throughput':>24}")
+    for r in results:
+        if 'skipped' in r:
+            print(f"{r['stage']:<11}{'':<13}{r['size']:>9}  skipped: {r['skipped']}")
+            continue
+        throughput = f"{r['throughput']:,.0f} {r['unit']}" if r['throughput'] else '-'
+        print(f"{r['stage']:<11}{r['variant'] or '':<13}{r['size']:>9}{r['p50_ms']:>11.2f}"
+              f"{r['p95_ms']:>11.2f}{throughput:>24}")
+
+
+def result_key(result):
+    return result['stage'], result['variant'], result['size']
+
+
+def compare(results, baseline, threshold):
+    """
+    Print the p50 of each result against the baseline run. Returns the
+    results slower than the baseline by more than threshold (a fraction).
+    """
+    previous = {result_key(r): r for r in baseline['results'] if 'skipped' not in r}
+    regressions = []
+    print(f"\n{'stage':<11}{'variant':<13}{'size':>9}{'base p50':>11}{'p50':>11}{'change':>9}")
+    for r in results:
+        base = previous.get(result_key(r))
+        if 'skipped' in r or base is None or not base['p50_ms']:
+            continue
+        change = r['p50_ms'] / base['p50_ms'] - 1
+        flag = ''
+        if change > threshold:
+            regressions.append(r)
+            flag = '  REGRESSION'
+        print(f"{r['stage']:<11}{r['variant'] or '':<13}{r['size']:>9}{base['p50_ms']:>11.2f}"
+              f"{r['p50_ms']:>11.2f}{change:>+9.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the pipeline offline.")
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=list(STAGES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=list(DEFAULT_SIZES),
+                        help="synthetic corpus sizes, in headlines")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--wordcloud-max', type=int, default=100_000,
+                        help="largest corpus the word cloud is generated for")
+    parser.add_argument('--latency', type=float, default=0.0, help="mock server delay per request, seconds")
+    parser.add_argument('--jitter', type=float, default=0.0, help="extra random delay per request, seconds")
+    parser.add_argument('--failure-rate', type=float, default=0.0, help="fraction of requests that fail")
+    parser.add_argument('--failure-mode', choices=['status', 'drop'], default='status')
+    parser.add_argument('--json', help="write the results to this file")
+    parser.add_argument('--compare', help="earlier --json output to compare against")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="p50 slowdown (fraction) counted as a regression")
+    args = parser.parse_args()
+
+    results = run(args)
+    print_results(results)
+
+    if args.json:
+        report = {
+            'meta': {
+                'time': time.time(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'args': vars(args),
+                'fixtures': {site: fixture_kind(site) for site in sorted(set(SCRAPER_FIXTURES.values()))},
+            },
+            'results': results,
+        }
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
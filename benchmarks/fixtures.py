@@ -0,0 +1,179 @@
+"""
+Saved front pages for the benchmarks.
+
+Pages recorded from the live sites are kept in benchmarks/fixtures/<site>.html
+(run `python benchmarks/fixtures.py --record` to refresh them). When a site has
+no recording, a deterministic synthetic page with the same headline markup and
+a realistic amount of surrounding noise is generated instead, so the
+benchmarks always run offline. No recordings are committed, so out of the box
+every page is synthetic; benchmark results carry a "fixture" field saying
+which kind each number was measured on.
+"""
+import argparse
+import os
+import random
+import sys
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+# Page downloaded by each site's scraper
+SITE_URLS = {
+    'inquirer': "https://newsinfo.inquirer.net",
+    'bbc': "https://www.bbc.com/news",
+    'philstar': "https://www.philstar.com/",
+    'manilatimes': "https://www.manilatimes.net",
+    'rappler': "https://www.rappler.com",
+    'foxnews': "https://www.foxnews.com/",
+}
+
+# Fixture of each scraper in the CLI and GUI registries
+SCRAPER_FIXTURES = {
+    'scrape_inquirer': 'inquirer',
+    'scrape_bbc': 'bbc',
+    'scrape_philstar': 'philstar',
+    'scrape_manilaTimes': 'manilatimes',
+    'scrape_rappler': 'rappler',
+    'scrape_foxnews': 'foxnews',
+}
+
+WORDS = (
+    "senate house president marcos duterte manila cebu davao typhoon flood "
+    "budget inflation peso rice oil price court ruling police arrest drug "
+    "election poll vote campaign china sea coast guard navy ship island "
+    "storm rain power outage traffic metro rail airport flight tourism "
+    "school teacher student exam health hospital vaccine dengue outbreak "
+    "market stocks bank loan tax tariff export import jobs workers wage "
+    "strike protest rally church festival music film award star league "
+    "game team coach win loss final record crash fire quake volcano alert"
+).split()
+
+
+def synthetic_headline(rng):
+    words = [rng.choice(WORDS) for _ in range(rng.randint(5, 12))]
+    return ' '.join(words).capitalize()
+
+
+def synthetic_headlines(count, seed=0):
+    """Return count reproducible headline strings."""
+    rng = random.Random(seed)
+    return [synthetic_headline(rng) for _ in range(count)]
+
+
+def _noise(rng, blocks):
+    """Navigation, teasers and scripts that surround the headlines on a real page."""
+    parts = []
+    for i in range(blocks):
+        links = ''.join(f'<li class="nav-item"><a href="/section/{i}/{j}">{rng.choice(WORDS)}</a></li>'
+                        for j in range(8))
+        teaser = ' '.join(rng.choice(WORDS) for _ in range(40))
+        parts.append(
+            f'<div class="block block-{i}"><nav><ul class="menu">{links}</ul></nav>'
+            f'<div class="teaser"><span class="label">{rng.choice(WORDS)}</span><p>{teaser}</p>'
+            f'<img src="/img/{i}.jpg" alt="{rng.choice(WORDS)}"></div>'
+            f'<script>window.__data_{i} = {{"id": {i}, "slot": "ad-{i}"}};</script></div>'
+        )
+    return parts
+
+
+def _headline_markup(site, rng, i):
+    headline = synthetic_headline(rng)
+    link = f"/{site}/story/{i}"
+    if site == 'inquirer':
+        return f'<div class="story"><h6><a href="{link}">{headline}</a></h6></div>'
+    if site == 'bbc':
+        return f'<div data-testid="card"><a href="{link}"><h2 data-testid="card-headline">{headline}</h2></a></div>'
+    if site == 'philstar':
+        return f'<div class="news_item"><h2 class="title"><a href="{link}">{headline}</a></h2></div>'
+    if site == 'manilatimes':
+        size = ('h1', 'h4', 'h5')[i % 3]
+        return f'<div class="item"><div class="article-title-{size} article-title"><a href="{link}">{headline}</a></div></div>'
+    if site == 'rappler':
+        if i % 5 == 0:
+            return f'<div class="video-card" data-title="{headline}"></div>'
+        return f'<article><h3><a href="{link}">{headline}</a></h3></article>'
+    if site == 'foxnews':
+        return f'<article class="story"><h3 class="title"><a href="{link}">{headline}</a></h3></article>'
+    raise ValueError(f"Unknown site: {site}")
+
+
+def synthesize(site, headlines=80, noise_blocks=250, seed=0):
+    """Generate a front page with the headline markup of a site."""
+    rng = random.Random(f"{site}-{seed}")
+    parts = _noise(rng, noise_blocks)
+    for i in range(headlines):
+        parts.insert(rng.randrange(len(parts) + 1), _headline_markup(site, rng, i))
+    # Philstar's first and last <h2> are not headlines
+    return (
+        '<!DOCTYPE html><html><head><title>Front page</title>'
+        '<link rel="stylesheet" href="/main.css"></head><body>'
+        '<header><h2 class="site-name">Front page</h2></header>'
+        + ''.join(parts)
+        + '<footer><h2>Subscribe</h2></footer></body></html>'
+    )
+
+
+def fixture_path(site):
+    return os.path.join(FIXTURE_DIR, f"{site}.html")
+
+
+def fixture_kind(site):
+    """Return 'recorded' if the site has a saved page, else 'synthetic'."""
+    return 'recorded' if os.path.exists(fixture_path(site)) else 'synthetic'
+
+
+def load_fixture(site):
+    """Return the recorded page of a site as bytes, or a synthetic one."""
+    path = fixture_path(site)
+    if os.path.exists(path):
+        with open(path, 'rb') as f:
+            return f.read()
+    return synthesize(site).encode('utf-8')
+
+
+def load_sites():
+    """
+    Return the registry entries of every scraper: the CLI's, plus the ones
+    only the GUI has (Fox News) when PyQt5 is installed.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    sys.path.insert(0, root)
+    from newsanalyzerCLI import SITES
+
+    sites = list(SITES)
+    try:
+        import importlib.machinery
+        import importlib.util
+        loader = importlib.machinery.SourceFileLoader('EGGnewsUI', os.path.join(root, 'EGGnewsUI.PY'))
+        spec = importlib.util.spec_from_loader('EGGnewsUI', loader)
+        gui = importlib.util.module_from_spec(spec)
+        loader.exec_module(gui)
+    except ImportError as e:
+        print(f"Skipping the GUI-only sites: {e}")
+        return sites
+    names = {site['name'] for site in sites}
+    return sites + [site for site in gui.SITES if site['name'] not in names]
+
+
+def record(sites):
+    """Download the live front pages into the fixture directory."""
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from fetcher import fetch
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    for site in sites:
+        response = fetch(SITE_URLS[site])
+        with open(fixture_path(site), 'wb') as f:
+            f.write(response.content)
+        print(f"Recorded {site}: {len(response.content)} bytes")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--record', action='store_true', help="save the live front pages")
+    parser.add_argument('sites', nargs='*', default=list(SITE_URLS))
+    args = parser.parse_args()
+    if args.record:
+        record(args.sites)
+    else:
+        for site in args.sites:
+            print(f"{site}: {len(load_fixture(site))} bytes ({fixture_kind(site)})")
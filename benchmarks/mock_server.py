@@ -0,0 +1,145 @@
+"""
+Local stand-in for the news sites.
+
+Serves the fixture page of each site at http://127.0.0.1:<port>/<site>, with
+optional latency, jitter and injected failures, so scrapes can be timed
+without touching the network. Pages carry an ETag and answer a matching
+If-None-Match with 304, like the real sites.
+
+    with MockNewsServer(latency=0.05, failure_rate=0.1) as server:
+        fetcher.set_url_rewriter(server.rewrite)
+        ...
+
+    python benchmarks/mock_server.py [--port N] [--latency S] [--failure-rate F]
+"""
+import argparse
+import hashlib
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from fixtures import SITE_URLS, load_fixture
+
+
+class MockNewsServer:
+    """
+    Threaded HTTP server for the fixture pages.
+    Each request waits latency seconds plus up to jitter more. A failure_rate
+    fraction of requests fails: with a 503 when failure_mode is 'status', or
+    by closing the connection without a response when it is 'drop'.
+    """
+
+    def __init__(self, port=0, latency=0.0, jitter=0.0, failure_rate=0.0, failure_mode='status',
+                 seed=0, pages=None):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.failure_mode = failure_mode
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+        self.pages = pages if pages is not None else {site: load_fixture(site) for site in SITE_URLS}
+        self.etags = {site: '"' + hashlib.sha1(page).hexdigest() + '"' for site, page in self.pages.items()}
+        self.requests = 0
+        self.failures = 0
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def port(self):
+        return self.httpd.server_address[1]
+
+    def url_for(self, site):
+        return f"http://127.0.0.1:{self.port}/{site}"
+
+    def rewrite(self, url):
+        """Map a real site url (as in fixtures.SITE_URLS) to this server; others are left alone."""
+        for site, site_url in SITE_URLS.items():
+            if url.rstrip('/') == site_url.rstrip('/'):
+                return self.url_for(site)
+        return url
+
+    def _draw(self):
+        """Return (delay, fail) for one request."""
+        with self.rng_lock:
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0)
+            fail = self.failure_rate > 0 and self.rng.random() < self.failure_rate
+            self.requests += 1
+            self.failures += fail
+        return delay, fail
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                delay, fail = server._draw()
+                if delay:
+                    time.sleep(delay)
+                if fail:
+                    if server.failure_mode == 'drop':
+                        self.close_connection = True
+                        return
+                    self.send_response(503)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+
+                site = self.path.strip('/')
+                page = server.pages.get(site)
+                if page is None:
+                    self.send_error(404)
+                    return
+                if self.headers.get('If-None-Match') == server.etags[site]:
+                    self.send_response(304)
+                    self.send_header('ETag', server.etags[site])
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(page)))
+                self.send_header('ETag', server.etags[site])
+                self.end_headers()
+                self.wfile.write(page)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Serve the fixture pages locally.")
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--latency', type=float, default=0.0)
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    parser.add_argument('--failure-mode', choices=['status', 'drop'], default='status')
+    args = parser.parse_args()
+
+    server = MockNewsServer(args.port, args.latency, args.jitter, args.failure_rate, args.failure_mode)
+    for site in server.pages:
+        print(server.url_for(site))
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
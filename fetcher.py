@@ -0,0 +1,251 @@
+"""Shared HTTP fetch engine used by the CLI and the GUI scrapers."""
+import functools
+import os
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import instrumentation
+from http_cache import HTTPCache
+
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36')
+
+# Global cap on the number of sites downloaded at the same time
+MAX_CONCURRENCY = 5
+
+# How often a running batch of scrapers checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.2
+
+# (connect, read) timeouts in seconds, per host
+DEFAULT_TIMEOUT = (5, 15)
+HOST_TIMEOUTS = {
+    'www.bbc.com': (5, 10),
+    'www.foxnews.com': (5, 10),
+}
+
+# Retry transient failures with exponential backoff (0.5s, 1s, 2s)
+RETRY_TOTAL = 3
+RETRY_BACKOFF = 0.5
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+# Held by every download, however many batches of scrapers are running
+_download_slots = threading.BoundedSemaphore(MAX_CONCURRENCY)
+_cache = None
+
+# When offline, pages are replayed from the cache and the network is never touched
+_offline = os.environ.get('NEWS_ANALYZER_OFFLINE', '') not in ('', '0')
+
+# Optional function mapping each url to the one actually requested, e.g. a
+# local stand-in server for the benchmarks
+_url_rewriter = None
+
+
+class OfflineCacheMiss(requests.RequestException):
+    """Raised in offline mode when a page has never been cached."""
+
+
+def set_offline(offline):
+    """Switch replay-from-cache mode on or off."""
+    global _offline
+    _offline = offline
+
+
+def is_offline():
+    return _offline
+
+
+def set_url_rewriter(rewriter):
+    """Request rewriter(url) instead of each url; None goes back to the real sites."""
+    global _url_rewriter
+    _url_rewriter = rewriter
+
+
+def get_cache():
+    """Return the shared on-disk response cache, creating it on first use."""
+    global _cache
+    with _session_lock:
+        if _cache is None:
+            _cache = HTTPCache()
+    return _cache
+
+
+def get_session():
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            retry = Retry(
+                total=RETRY_TOTAL,
+                backoff_factor=RETRY_BACKOFF,
+                status_forcelist=RETRY_STATUSES,
+                allowed_methods=frozenset(['GET', 'HEAD']),
+                raise_on_status=False,
+            )
+            adapter = HTTPAdapter(max_retries=retry,
+                                  pool_connections=MAX_CONCURRENCY,
+                                  pool_maxsize=MAX_CONCURRENCY)
+            session = requests.Session()
+            session.headers['User-Agent'] = USER_AGENT
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _session = session
+    return _session
+
+
+def timeout_for(url):
+    """Look up the (connect, read) timeout configured for the url's host."""
+    return HOST_TIMEOUTS.get(urlparse(url).netloc, DEFAULT_TIMEOUT)
+
+
+def request_url(url):
+    """The url actually requested (and cached) for url, after the rewriter."""
+    return _url_rewriter(url) if _url_rewriter is not None else url
+
+
+def site_of(url):
+    """Label a url is reported under in the stats: its host."""
+    return urlparse(url).netloc
+
+
+def fetch(url, headers=None):
+    """
+    GET a url over the shared session with the host's timeout and retries.
+    Sends the cached validators so an unchanged page comes back as a 304 and
+    is served from the cache with not_modified set.
+    Raises requests.RequestException if the site could not be reached.
+    """
+    site = site_of(url)
+    url = request_url(url)
+    try:
+        with _download_slots, instrumentation.timer('fetch', site):
+            response = _fetch(url, headers)
+    except requests.RequestException:
+        instrumentation.count('fetch_errors', site=site)
+        raise
+    if response.from_cache:
+        instrumentation.count('cache_hits', kind='page')
+    else:
+        instrumentation.count('bytes', len(response.content), site=site)
+    return response
+
+
+def _fetch(url, headers):
+    cache = get_cache()
+    if _offline:
+        cached = cache.load(url)
+        if cached is None:
+            raise OfflineCacheMiss(f"{url} is not in the cache")
+        return cached
+
+    request_headers = cache.conditional_headers(url)
+    request_headers.update(headers or {})
+    response = get_session().get(url, headers=request_headers, timeout=timeout_for(url))
+
+    if response.status_code == 304:
+        cached = cache.load(url)
+        if cached is not None:
+            return cached
+        # The cache lost the body, so fetch it again unconditionally
+        response = get_session().get(url, headers=headers, timeout=timeout_for(url))
+
+    if response.status_code == 200:
+        cache.store(url, response)
+    response.from_cache = False
+    response.not_modified = False
+    return response
+
+
+def scraper(url, headers=None, key=None):
+    """
+    Decorator turning a parse function that takes a response into a
+    zero-argument scraper that downloads the url first.
+    key names the parser in the parsed-articles cache and must change
+    whenever its output could; it defaults to the function's file and name.
+    """
+    def decorate(parse):
+        parser_key = key or f"{os.path.basename(parse.__code__.co_filename)}:{parse.__name__}"
+
+        site = site_of(url)
+
+        @functools.wraps(parse)
+        def scrape():
+            with instrumentation.timer('scrape', site):
+                articles = _scrape()
+            instrumentation.count('articles', len(articles), site=site)
+            return articles
+
+        def _scrape():
+            try:
+                response = fetch(url, headers=headers)
+            except requests.RequestException as e:
+                print(f"Failed to retrieve {url}: {e}")
+                return []
+
+            # Unchanged page: reuse the articles parsed from it last time
+            cache_url = request_url(url)
+            if response.not_modified:
+                articles = get_cache().load_articles(cache_url, parser_key)
+                if articles is not None:
+                    instrumentation.count('cache_hits', kind='articles')
+                    return articles
+
+            with instrumentation.timer('parse', site):
+                articles = parse(response)
+            if response.status_code == 200:
+                get_cache().store_articles(cache_url, parser_key, articles)
+            return articles
+
+        scrape.url = url
+        return scrape
+    return decorate
+
+
+def iter_scrapers(scrapers, cancel_event=None):
+    """
+    Run the given scrapers concurrently and yield (index, articles) for each
+    one as soon as its page has been downloaded and parsed. Setting
+    cancel_event stops the iteration and drops the scrapers not started yet.
+    """
+    if not scrapers:
+        return
+
+    pool = ThreadPoolExecutor(max_workers=min(MAX_CONCURRENCY, len(scrapers)))
+    try:
+        futures = {pool.submit(scrape): i for i, scrape in enumerate(scrapers)}
+        pending = set(futures)
+        while pending:
+            # Wake up regularly so a cancel is noticed even while sites are slow
+            done, pending = wait(pending, timeout=CANCEL_POLL_SECONDS, return_when=FIRST_COMPLETED)
+            for future in done:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                try:
+                    articles = future.result()
+                except Exception as e:
+                    print(f"Scraper {scrapers[futures[future]].__name__} failed: {e}")
+                    articles = []
+                yield futures[future], articles
+            if cancel_event is not None and cancel_event.is_set():
+                return
+    finally:
+        # Downloads already in flight finish in the background
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_scrapers(scrapers):
+    """
+    Run the given scrapers concurrently, parsing each page as soon as it
+    arrives. Returns the list of article lists in the order given, so the
+    total wall time tracks the slowest site instead of the sum of all sites.
+    """
+    results = [[] for _ in scrapers]
+    for i, articles in iter_scrapers(scrapers):
+        results[i] = articles
+    return results
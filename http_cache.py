@@ -0,0 +1,219 @@
+"""On-disk HTTP response cache with conditional GET support for the scrapers."""
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CACHE_DIR = os.environ.get(
+    'NEWS_ANALYZER_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.news_analyzer_cache')
+)
+
+# Least recently used entries are evicted once the store grows past this size
+MAX_CACHE_BYTES = 50 * 1024 * 1024
+
+INDEX_FILE = 'index.json'
+LOCK_FILE = 'index.lock'
+BODY_SUFFIXES = ('.body.z', '.articles.z')
+
+
+class CachedResponse:
+    """A stored page that quacks like the parts of requests.Response the scrapers use."""
+
+    def __init__(self, url, content, encoding, headers, not_modified=True):
+        self.url = url
+        self.status_code = 200
+        self.content = content
+        self.encoding = encoding
+        self.headers = headers
+        self.from_cache = True
+        # True when the page is unchanged from the copy the cached articles were parsed from
+        self.not_modified = not_modified
+
+    @property
+    def text(self):
+        return self.content.decode(self.encoding or 'utf-8', errors='replace')
+
+
+class HTTPCache:
+    """
+    Persistent response cache keyed by url. Bodies are stored zlib-compressed
+    next to a JSON index holding the ETag/Last-Modified validators, sizes and
+    last-use times used for LRU eviction. Parsed articles can be stored along
+    with a page so an unchanged page does not have to be parsed again.
+
+    Several processes (the daemon, the CLI, the GUI) may share a directory:
+    every change re-reads the index and writes it back under a file lock, so
+    none of them drops the others' entries.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_bytes=MAX_CACHE_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        self._index = self._read_index()
+
+    def _read_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @contextmanager
+    def _locked(self):
+        """Hold the index against other threads and processes, freshly read from disk."""
+        with self._lock, open(os.path.join(self.directory, LOCK_FILE), 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                self._index = self._read_index()
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_index(self):
+        path = os.path.join(self.directory, INDEX_FILE)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self._index, f)
+        os.replace(tmp_path, path)
+
+    def _path(self, url, suffix):
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + suffix)
+
+    def _read_compressed(self, path):
+        try:
+            with open(path, 'rb') as f:
+                return zlib.decompress(f.read())
+        except (OSError, zlib.error):
+            return None
+
+    def _write_compressed(self, path, data):
+        compressed = zlib.compress(data)
+        with open(path, 'wb') as f:
+            f.write(compressed)
+        return len(compressed)
+
+    def conditional_headers(self, url):
+        """Return the If-None-Match/If-Modified-Since headers for a cached url."""
+        entry = self._index.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def load(self, url, not_modified=True):
+        """Return the cached page for a url, or None if it is not cached."""
+        with self._locked():
+            entry = self._index.get(url)
+            if not entry:
+                return None
+            content = self._read_compressed(self._path(url, '.body.z'))
+            if content is None:
+                del self._index[url]
+                self._write_index()
+                return None
+            entry['last_used'] = time.time()
+            self._write_index()
+        return CachedResponse(url, content, entry.get('encoding'),
+                              entry.get('headers', {}), not_modified)
+
+    def store(self, url, response):
+        """Save a 200 response along with its validators."""
+        with self._locked():
+            size = self._write_compressed(self._path(url, '.body.z'), response.content)
+            # A new body invalidates the articles parsed from the previous one
+            articles_path = self._path(url, '.articles.z')
+            if os.path.exists(articles_path):
+                os.remove(articles_path)
+            self._index[url] = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'encoding': response.encoding,
+                'headers': {'Content-Type': response.headers.get('Content-Type', '')},
+                'body_size': size,
+                'articles_size': 0,
+                'articles': {},
+                'last_used': time.time(),
+            }
+            self._evict()
+            self._write_index()
+
+    def load_articles(self, url, parser_key):
+        """Return the articles previously parsed from the cached page, or None."""
+        entry = self._index.get(url)
+        if not entry or parser_key not in entry.get('articles', {}):
+            return None
+        data = self._read_compressed(self._path(url, '.articles.z'))
+        if data is None:
+            return None
+        return json.loads(data).get(parser_key)
+
+    def store_articles(self, url, parser_key, articles):
+        """Remember the articles a parser extracted from the cached page."""
+        with self._locked():
+            entry = self._index.get(url)
+            if not entry:
+                return
+            path = self._path(url, '.articles.z')
+            data = self._read_compressed(path)
+            stored = json.loads(data) if data else {}
+            stored[parser_key] = articles
+            entry['articles_size'] = self._write_compressed(path, json.dumps(stored).encode('utf-8'))
+            entry['articles'] = {key: True for key in stored}
+            self._evict()
+            self._write_index()
+
+    def _evict(self):
+        total = sum(e['body_size'] + e['articles_size'] for e in self._index.values())
+        by_age = sorted(self._index.items(), key=lambda item: item[1]['last_used'])
+        for url, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= entry['body_size'] + entry['articles_size']
+            for suffix in BODY_SUFFIXES:
+                path = self._path(url, suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+            del self._index[url]
+
+        # Bodies no index entry refers to (e.g. left behind by an older
+        # version) would otherwise never be evicted
+        known = {os.path.basename(self._path(url, suffix))
+                 for url in self._index for suffix in BODY_SUFFIXES}
+        for name in os.listdir(self.directory):
+            if name.endswith(BODY_SUFFIXES) and name not in known:
+                os.remove(os.path.join(self.directory, name))
+
+    def clear(self):
+        """Remove every cached page."""
+        with self._locked():
+            for url in list(self._index):
+                for suffix in BODY_SUFFIXES:
+                    path = self._path(url, suffix)
+                    if os.path.exists(path):
+                        os.remove(path)
+            self._index = {}
+            self._write_index()
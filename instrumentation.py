@@ -0,0 +1,240 @@
+"""
+Lightweight timers and counters for every stage of the pipeline.
+
+Each stage (fetch, parse, tokenize, sentiment, keywords, clusters, ...) is
+timed with `timer`, optionally per site, and events such as bytes downloaded,
+articles extracted and cache hits are added up with `count`, labelled by site
+or by kind (see COUNTERS). Stages can nest
+(keyword counting includes the tokenizing it triggers). The totals are shown
+as a one-line summary, an HTML table for the GUI or Prometheus text.
+
+Profiling is opt-in: `profiling()` runs cProfile or, if installed,
+pyinstrument around a block when NEWS_ANALYZER_PROFILE (or its mode
+argument) is 'cprofile' or 'pyinstrument'.
+"""
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Profiler to use around profiling() blocks, if any
+PROFILE_MODE = os.environ.get('NEWS_ANALYZER_PROFILE', '').lower() or None
+PROFILE_DIR = os.environ.get('NEWS_ANALYZER_PROFILE_DIR', '.')
+
+# Order stages are reported in; others follow alphabetically
+STAGES = ('scrape', 'fetch', 'parse', 'tokenize', 'sentiment', 'keywords', 'clusters', 'wordcloud')
+
+# Description of each counter, for the Prometheus HELP lines
+COUNTERS = {
+    'bytes': "Bytes downloaded, per site.",
+    'articles': "Articles extracted, per site.",
+    'fetch_errors': "Page downloads that failed, per site.",
+    'cache_hits': "Lookups answered from a cache, per kind (page, articles, sentiment).",
+    'polls': "Daemon polling rounds.",
+    'poll_errors': "Daemon polling rounds that failed.",
+}
+
+_lock = threading.Lock()
+# (stage, site) -> [calls, total seconds, slowest call]
+_timers = {}
+# (name, ((label name, label), ...)) -> value
+_counters = {}
+
+
+def record(stage, seconds, site=None):
+    """Add one timed call of a stage."""
+    with _lock:
+        entry = _timers.get((stage, site))
+        if entry is None:
+            entry = _timers[(stage, site)] = [0, 0.0, 0.0]
+        entry[0] += 1
+        entry[1] += seconds
+        entry[2] = max(entry[2], seconds)
+
+
+@contextmanager
+def timer(stage, site=None):
+    """Time the enclosed block as one call of a stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(stage, time.perf_counter() - start, site)
+
+
+def count(name, value=1, **labels):
+    """
+    Add value to a counter, e.g. count('bytes', 1024, site='www.bbc.com') or
+    count('cache_hits', kind='page').
+    """
+    if not value:
+        return
+    key = (name, tuple(sorted((key, label) for key, label in labels.items() if label is not None)))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+
+def reset():
+    with _lock:
+        _timers.clear()
+        _counters.clear()
+
+
+def snapshot():
+    """
+    Return the totals so far: {'stages': {stage: {'calls', 'seconds', 'max'}},
+    'sites': {(stage, site): ...}, 'counters': {name: total},
+    'labels': {(name, ((label name, label), ...)): value}}.
+    """
+    with _lock:
+        timers = {key: list(value) for key, value in _timers.items()}
+        counters = dict(_counters)
+
+    stages, sites = {}, {}
+    for (stage, site), (calls, seconds, slowest) in timers.items():
+        total = stages.setdefault(stage, {'calls': 0, 'seconds': 0.0, 'max': 0.0})
+        total['calls'] += calls
+        total['seconds'] += seconds
+        total['max'] = max(total['max'], slowest)
+        if site is not None:
+            sites[(stage, site)] = {'calls': calls, 'seconds': seconds, 'max': slowest}
+
+    totals = {}
+    for (name, labels), value in counters.items():
+        totals[name] = totals.get(name, 0) + value
+    return {'stages': stages, 'sites': sites, 'counters': totals, 'labels': counters}
+
+
+def _ordered(stages):
+    return sorted(stages, key=lambda s: (STAGES.index(s) if s in STAGES else len(STAGES), s))
+
+
+def _size(n):
+    for unit in ('B', 'KB', 'MB'):
+        if n < 1024:
+            return f"{n:.0f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+
+def summary_line():
+    """One line with the time per stage and the main counters."""
+    snap = snapshot()
+    parts = [f"{stage} {snap['stages'][stage]['seconds']:.2f}s" for stage in _ordered(snap['stages'])]
+    counters = snap['counters']
+    parts.append(f"{_size(counters.get('bytes', 0))} downloaded")
+    parts.append(f"{counters.get('articles', 0)} articles")
+    parts.append(f"{counters.get('cache_hits', 0)} cache hits")
+    return "Stats: " + " | ".join(parts)
+
+
+def stats_html():
+    """Per-stage and per-site timings as an HTML table, for the GUI."""
+    snap = snapshot()
+    rows = ["<tr><th align='left'>Stage</th><th align='left'>Site</th><th>Calls</th>"
+            "<th>Total s</th><th>Max s</th></tr>"]
+    for stage in _ordered(snap['stages']):
+        total = snap['stages'][stage]
+        rows.append(f"<tr><td><b>{stage}</b></td><td></td><td>{total['calls']}</td>"
+                    f"<td>{total['seconds']:.3f}</td><td>{total['max']:.3f}</td></tr>")
+        for (s, site), entry in sorted(snap['sites'].items()):
+            if s == stage:
+                rows.append(f"<tr><td></td><td>{site}</td><td>{entry['calls']}</td>"
+                            f"<td>{entry['seconds']:.3f}</td><td>{entry['max']:.3f}</td></tr>")
+    counters = ', '.join(f"{name}: {_size(value) if name == 'bytes' else value}"
+                         for name, value in sorted(snap['counters'].items()))
+    return f"<table cellspacing='4'>{''.join(rows)}</table><p>{counters or 'No counters yet.'}</p>"
+
+
+def _labels(**labels):
+    pairs = [f'{key}="{value}"' for key, value in labels.items() if value is not None]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def prometheus_text(prefix='news_analyzer'):
+    """The totals in the Prometheus text exposition format."""
+    with _lock:
+        timers = sorted(_timers.items(), key=lambda item: (item[0][0], item[0][1] or ''))
+        counters = sorted(_counters.items())
+
+    lines = [
+        f"# HELP {prefix}_stage_seconds_total Time spent in each pipeline stage.",
+        f"# TYPE {prefix}_stage_seconds_total counter",
+    ]
+    lines += [f"{prefix}_stage_seconds_total{_labels(stage=stage, site=site)} {seconds:.6f}"
+              for (stage, site), (calls, seconds, slowest) in timers]
+    lines += [
+        f"# HELP {prefix}_stage_calls_total Number of times each pipeline stage ran.",
+        f"# TYPE {prefix}_stage_calls_total counter",
+    ]
+    lines += [f"{prefix}_stage_calls_total{_labels(stage=stage, site=site)} {calls}"
+              for (stage, site), (calls, seconds, slowest) in timers]
+
+    seen = set()
+    for (name, labels), value in counters:
+        metric = f"{prefix}_{name}_total"
+        if metric not in seen:
+            seen.add(metric)
+            lines.append(f"# HELP {metric} {COUNTERS.get(name, name.replace('_', ' ').capitalize() + '.')}")
+            lines.append(f"# TYPE {metric} counter")
+        lines.append(f"{metric}{_labels(**dict(labels))} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def write_prometheus(path):
+    """Write prometheus_text() to path atomically, e.g. for a textfile collector."""
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
+
+
+@contextmanager
+def profiling(name='news_analyzer', mode=None):
+    """
+    Profile the enclosed block when mode (default PROFILE_MODE) is
+    'cprofile' or 'pyinstrument'; otherwise do nothing. cProfile stats are
+    saved to PROFILE_DIR/<name>.prof and pyinstrument's report to
+    PROFILE_DIR/<name>.html. Only the calling thread is profiled.
+    """
+    mode = (mode or PROFILE_MODE or '').lower()
+    if not mode:
+        yield
+        return
+
+    if mode == 'pyinstrument':
+        try:
+            from pyinstrument import Profiler
+        except ImportError:
+            print("pyinstrument is not installed, using cProfile instead.")
+            mode = 'cprofile'
+        else:
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = os.path.join(PROFILE_DIR, f"{name}.html")
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+                print(profiler.output_text(unicode=True, color=False))
+                print(f"Profile saved to {path}")
+            return
+
+    if mode != 'cprofile':
+        raise ValueError(f"Unknown profiler: {mode}")
+
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        path = os.path.join(PROFILE_DIR, f"{name}.prof")
+        profiler.dump_stats(path)
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(20)
+        print(f"Profile saved to {path}")
@@ -0,0 +1,152 @@
+"""
+Incremental keyword frequencies.
+
+Articles are fed in as they arrive and only their own tokens are counted, so
+the running totals never have to be rebuilt from the whole corpus. Counts are
+also kept in time buckets, from which running counts for rolling windows
+(last hour, day, week) are maintained by adding new buckets and subtracting
+expired ones. Top-k queries use a heap instead of sorting the vocabulary.
+"""
+import bisect
+import hashlib
+import heapq
+import threading
+import time
+from collections import Counter
+from operator import itemgetter
+
+import instrumentation
+from text_processing import tokenize_article
+
+# Size of the time buckets windows are built from
+BUCKET_SECONDS = 60
+
+WINDOWS = {
+    'hour': 3600,
+    'day': 86400,
+    'week': 7 * 86400,
+}
+
+
+def article_key(article):
+    return hashlib.blake2b(' '.join(article['headline'].casefold().split()).encode('utf-8'),
+                           digest_size=16).digest()
+
+
+class KeywordCounter:
+    """
+    Running keyword counts over a stream of articles. Every article added is
+    counted, like a FreqDist over their text; with dedupe, articles whose
+    normalized headline was already counted are skipped instead, for streams
+    such as overlapping scrapes of a stored history. Adding and querying may
+    happen on different threads.
+    """
+
+    def __init__(self, windows=WINDOWS, bucket_seconds=BUCKET_SECONDS, dedupe=False):
+        self.bucket_seconds = bucket_seconds
+        self.dedupe = dedupe
+        self.windows = dict(windows)
+        self.totals = Counter()
+        self.articles = 0
+        self._seen = set()
+        self._buckets = {}
+        self._bucket_keys = []
+        # Per window: running counts and the first bucket they include
+        self._window_counts = {name: Counter() for name in self.windows}
+        self._window_start = {name: None for name in self.windows}
+        self._lock = threading.Lock()
+
+    def _bucket(self, timestamp):
+        return int(timestamp // self.bucket_seconds)
+
+    def add(self, article, timestamp=None):
+        """
+        Count the keywords of one article, bucketed by timestamp (default its
+        first_seen time, else now). With dedupe, an article already counted
+        (same normalized headline) is ignored.
+        Returns whether the article was counted.
+        """
+        if timestamp is None:
+            timestamp = article.get('first_seen')
+        if timestamp is None:
+            timestamp = time.time()
+        tokens = tokenize_article(article)
+
+        with self._lock:
+            if self.dedupe:
+                key = article_key(article)
+                if key in self._seen:
+                    return False
+                self._seen.add(key)
+
+            self.totals.update(tokens)
+            self.articles += 1
+
+            idx = self._bucket(timestamp)
+            bucket = self._buckets.get(idx)
+            if bucket is None:
+                bucket = self._buckets[idx] = Counter()
+                bisect.insort(self._bucket_keys, idx)
+            bucket.update(tokens)
+
+            for name, start in self._window_start.items():
+                if start is not None and idx >= start:
+                    self._window_counts[name].update(tokens)
+        return True
+
+    def add_many(self, articles):
+        """Count a batch of articles; returns how many were counted."""
+        with instrumentation.timer('keywords'):
+            return sum(self.add(article) for article in articles)
+
+    def _advance(self, name, now):
+        """Bring a window's running counts up to date for the current time."""
+        start = self._bucket(now - self.windows[name]) + 1
+        counts = self._window_counts[name]
+        old_start = self._window_start[name]
+
+        if old_start is None or start < old_start:
+            # First query (or the clock went back): build from the buckets once
+            counts.clear()
+            lo = bisect.bisect_left(self._bucket_keys, start)
+            for idx in self._bucket_keys[lo:]:
+                counts.update(self._buckets[idx])
+        else:
+            # Subtract only the buckets that fell out of the window
+            lo = bisect.bisect_left(self._bucket_keys, old_start)
+            hi = bisect.bisect_left(self._bucket_keys, start)
+            for idx in self._bucket_keys[lo:hi]:
+                counts.subtract(self._buckets[idx])
+            for token in [t for t, c in counts.items() if c <= 0]:
+                del counts[token]
+        self._window_start[name] = start
+        self._expire(now)
+
+    def _expire(self, now):
+        """Drop buckets older than the longest window; the totals keep their counts."""
+        if not self.windows:
+            return
+        oldest = min(self._window_start[name] if self._window_start[name] is not None
+                     else self._bucket(now - seconds) + 1
+                     for name, seconds in self.windows.items())
+        cut = bisect.bisect_left(self._bucket_keys, oldest)
+        for idx in self._bucket_keys[:cut]:
+            del self._buckets[idx]
+        del self._bucket_keys[:cut]
+
+    def _counts(self, window, now):
+        if window is None:
+            return self.totals
+        self._advance(window, now or time.time())
+        return self._window_counts[window]
+
+    def counts(self, window=None, now=None):
+        """Return a copy of the counts for a window name, or of the all-time totals."""
+        with self._lock:
+            return Counter(self._counts(window, now))
+
+    def top_k(self, k=10, window=None, now=None):
+        """Return the k most frequent keywords as (keyword, count) pairs."""
+        with self._lock:
+            return heapq.nlargest(k, self._counts(window, now).items(), key=itemgetter(1))
+
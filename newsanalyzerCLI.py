@@ -1,217 +1,108 @@
-import requests
-from bs4 import BeautifulSoup
-import re
-import nltk
-from nltk.tokenize import word_tokenize
-from nltk.corpus import stopwords
-from nltk.probability import FreqDist
-from nltk.sentiment import SentimentIntensityAnalyzer
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
-
-# Download NLTK resources
-nltk.download('punkt')
-nltk.download('stopwords')
-nltk.download('vader_lexicon')
+import argparse
+import csv
+import json
+import os
+import random
+import signal
+import threading
+import time
 
-# Websites to scrape
-websites = [
-    "https://www.inquirer.net",
-    "https://www.bbc.com/news",
-    "https://www.philstar.com",
-    "https://www.manilatimes.net",
-    "https://www.rappler.com"
-]
+import instrumentation
+from article_store import get_store
+from fetcher import run_scrapers, set_offline
+from keyword_engine import KeywordCounter
+from nltk_resources import ensure
+import sentiment
+from site_registry import (attr, build_scrapers, child, href_of, news_site,
+                           non_empty, raw_text_of, rule, text_of)
+from text_processing import all_tokens
 
 # 1. Web Scraping Functionality
-def scrape_inquirer():
-    url = "https://newsinfo.inquirer.net"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
-    }
-    response = requests.get(url, headers=headers)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    articles = []
-    
-    # Find all <h6> elements containing headlines
-    for item in soup.find_all('h6'):
-        headline_tag = item.find('a')
-        if headline_tag:
-            headline = headline_tag.text.strip()  # Extract text
-            link = headline_tag['href']  # Extract the link
-            
-            # Append the headline and link to the articles list
-            articles.append({
-                'headline': headline,
-                'summary': "No Summary",  # Inquirer may not have summaries on the main page
-                'link': link
-            })
-    
-    return articles
-
-def scrape_bbc():
-    """Scrape and return the latest news headlines from BBC News."""
-    # URL of BBC News
-    url = 'https://www.bbc.com/news'
-
-    # Send a GET request to the website
-    response = requests.get(url)
-
-    # List to store headlines
-    articles = []
-
-    # Check if the request was successful
-    if response.status_code == 200:
-        # Parse the HTML content
-        soup = BeautifulSoup(response.text, 'html.parser')
-
-        # Find all headlines in <h2> tags
-        headlines = soup.find_all('h2')
-
-        if not headlines:
-            print("No headlines found. The structure may have changed.")
-            return articles
-
-        # Iterate through the headlines, extracting and cleaning the text
-        for headline in headlines:
-            title = headline.get_text(strip=True)
-            # Using regex to filter out empty titles
-            if re.match(r'.+', title):
-                # Append the headline to the articles list
-                articles.append({'headline': title, 'summary': None})
-    else:
-        print(f"Failed to retrieve data: {response.status_code}")
-
-    return articles
+# Registry of the websites to scrape: where each one keeps its headlines
+SITES = [
+    news_site(
+        'scrape_inquirer',
+        "https://www.inquirer.net",
+        fetch_url="https://newsinfo.inquirer.net",
+        # Headlines are links inside <h6> elements
+        rules=[rule('h6', headline=child('a', raw_text_of), link=child('a', href_of))],
+        summary="No Summary",  # Inquirer may not have summaries on the main page
+    ),
+    news_site(
+        'scrape_bbc',
+        "https://www.bbc.com/news",
+        rules=[rule('h2')],
+        keep=non_empty,
+        empty_message="No headlines found. The structure may have changed.",
+    ),
+    news_site(
+        'scrape_philstar',
+        "https://www.philstar.com",
+        rules=[rule('h2.title a', headline=raw_text_of)],
+    ),
+    news_site(
+        'scrape_manilaTimes',
+        "https://www.manilatimes.net",
+        # Article titles live in divs classed by their size on the page
+        rules=[rule(f'div.{class_name}', headline=child('a', text_of))
+               for class_name in ('article-title-h1', 'article-title-h4', 'article-title-h5')],
+        keep=non_empty,
+    ),
+    news_site(
+        'scrape_rappler',
+        "https://www.rappler.com",
+        rules=[
+            rule('h3 a'),
+            # Divs carrying a 'data-title' attribute (e.g. video titles)
+            rule('div[data-title]', headline=attr('data-title')),
+        ],
+        keep=non_empty,
+    ),
+]
 
-def scrape_philstar():
-    url = "https://www.philstar.com"
-    response = requests.get(url)
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    articles = []
-    for item in soup.select('h2.title a'):  # Philstar headlines
-        headline = item.text.strip()
-        summary = None
-        articles.append({'headline': headline, 'summary': summary})
-    
-    return articles
+SCRAPERS = build_scrapers(SITES)
 
-def scrape_manilaTimes():
-    url = "https://www.manilatimes.net"
-    
-    # Send a GET request to fetch the HTML content of the page
-    response = requests.get(url)
-    
-    # Check if the request was successful
-    if response.status_code != 200:
-        print(f"Failed to retrieve the page. Status code: {response.status_code}")
-        return []
-    
-    # Parse the HTML content using BeautifulSoup
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    # List to store extracted article data (headlines and summaries)
-    articles = []
-    
-    # Targeting article titles with specific classes like 'article-title-h1', 'article-title-h4', and 'article-title-h5'
-    headline_classes = ['article-title-h1', 'article-title-h4', 'article-title-h5']
-    
-    # Extract headlines for each class
-    for class_name in headline_classes:
-        headline_divs = soup.find_all('div', class_=class_name)
-        
-        for div in headline_divs:
-            a_tag = div.find('a')  # Find the <a> tag inside the div
-            if a_tag:
-                headline = a_tag.get_text(strip=True)
-                summary = None  # Placeholder for summary
-                if headline:
-                    articles.append({'headline': headline, 'summary': summary})
-    
-    # Optionally, you can add logic to extract more details like summaries if they exist in a different section
-
-    return articles
+# Websites to scrape
+websites = list(SCRAPERS)
 
-def scrape_rappler():
-    url = "https://www.rappler.com"
-    
-    # Send a GET request to fetch the HTML content of the page
-    response = requests.get(url)
-    
-    # Check if the request was successful
-    if response.status_code != 200:
-        print(f"Failed to retrieve the page. Status code: {response.status_code}")
-        return []
-    
-    # Parse the HTML content using BeautifulSoup
-    soup = BeautifulSoup(response.content, 'html.parser')
-    
-    # List to store extracted article data (headlines and summaries)
-    articles = []
-    
-    # Extract headlines (using <h3> and <a> tags for Rappler)
-    for item in soup.select('h3 a'):  # Selecting <h3> tags with nested <a> tags
-        headline = item.get_text(strip=True)
-        summary = None  # Placeholder if you want to add summaries later
-        if headline:
-            articles.append({'headline': headline, 'summary': summary})
-    
-    # Extract titles from divs that contain the 'data-title' attribute (e.g., for video titles)
-    for div in soup.find_all('div', attrs={'data-title': True}):
-        video_title = div.get('data-title').strip()
-        if video_title:
-            articles.append({'headline': video_title, 'summary': None})
-    
-    return articles
+scrape_inquirer = SCRAPERS["https://www.inquirer.net"]
+scrape_bbc = SCRAPERS["https://www.bbc.com/news"]
+scrape_philstar = SCRAPERS["https://www.philstar.com"]
+scrape_manilaTimes = SCRAPERS["https://www.manilatimes.net"]
+scrape_rappler = SCRAPERS["https://www.rappler.com"]
 
 # Unified function to scrape from all websites
 def scrape_websites(websites_to_scrape):
-    all_articles = []
+    scrapers = [SCRAPERS[website] for website in websites_to_scrape if website in SCRAPERS]
     
-    for website in websites_to_scrape:
-        if website == "https://www.inquirer.net":
-            all_articles.extend(scrape_inquirer())
-        elif website == "https://www.bbc.com/news":
-            all_articles.extend(scrape_bbc())
-        elif website == "https://www.philstar.com":
-            all_articles.extend(scrape_philstar())
-        elif website == "https://www.manilatimes.net":
-            all_articles.extend(scrape_manilaTimes())
-        elif website == "https://www.rappler.com":
-            all_articles.extend(scrape_rappler())
+    # Download all selected sites at once and parse each page as it arrives
+    all_articles = []
+    for articles in run_scrapers(scrapers):
+        all_articles.extend(articles)
     
     return all_articles
 
 
 # 2. Text Processing Using NLTK
-def process_text(text):
-    """
-    Tokenizes and cleans up text by removing stopwords and non-alphabetic characters.
-    """
-    tokens = word_tokenize(text.lower())
-    tokens = [word for word in tokens if word.isalpha()]
-    tokens = [word for word in tokens if word not in stopwords.words('english')]
-    
-    return tokens
-
-def get_keywords_from_all_articles(articles):
+def get_keywords_from_all_articles(articles, counter=None, window=None, save_path=None, show=True):
     """
     Returns the most common keywords from all articles combined and displays a bar chart.
+    If a running KeywordCounter is given its counts are used directly, optionally
+    limited to a rolling window ('hour', 'day' or 'week').
+    The chart is saved to save_path if given; show=False skips the window.
     """
-    # Combine all headlines and summaries into a single text corpus
-    combined_text = ' '.join(
-        article['headline'] + ' ' + (article['summary'] or '') for article in articles
-    )
-    
-    # Tokenize and clean the combined text
-    tokens = process_text(combined_text)
-    fdist = FreqDist(tokens)
+    if counter is None:
+        # Count the tokens of every headline and summary (memoized per article)
+        counter = KeywordCounter()
+        counter.add_many(articles)
     
     # Get the most common 10 keywords
-    most_common_keywords = fdist.most_common(10)
+    most_common_keywords = counter.top_k(10, window)
+    if not most_common_keywords:
+        return most_common_keywords
     
+    import matplotlib.pyplot as plt
+
     # Separate the keywords and their frequencies for plotting
     keywords, frequencies = zip(*most_common_keywords)
     
@@ -223,7 +114,11 @@ def get_keywords_from_all_articles(articles):
     plt.ylabel('Frequency')
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.show()
+    if save_path:
+        plt.savefig(save_path)
+    if show:
+        plt.show()
+    plt.close()
     
     return most_common_keywords
 
@@ -232,29 +127,26 @@ def analyze_sentiment(text):
     """
     Analyzes sentiment of the provided text.
     """
-    sia = SentimentIntensityAnalyzer()
-    sentiment = sia.polarity_scores(text)
-    
-    return sentiment
+    return sentiment.score(text)
 
 def analyze_sentiment_overall(articles):
     """
     Analyzes the sentiment of all articles and calculates an overall sentiment summary.
     Returns: a dictionary with the count of positive, negative, neutral articles, and the overall sentiment.
     """
-    sia = SentimentIntensityAnalyzer()
     positive, negative, neutral = 0, 0, 0  # Counters for sentiment types
     total_compound = 0  # To calculate average sentiment
 
-    for article in articles:
-        text = article['summary'] or article['headline']
-        sentiment = sia.polarity_scores(text)
-        total_compound += sentiment['compound']
+    # Score every article in one batch; already scored texts come from the cache
+    scores = sentiment.score_many([article['summary'] or article['headline'] for article in articles])
+
+    for article_sentiment in scores:
+        total_compound += article_sentiment['compound']
         
         # Categorize the sentiment based on compound score
-        if sentiment['compound'] >= 0.05:
+        if article_sentiment['compound'] >= 0.05:
             positive += 1
-        elif sentiment['compound'] <= -0.05:
+        elif article_sentiment['compound'] <= -0.05:
             negative += 1
         else:
             neutral += 1
@@ -275,117 +167,498 @@ def analyze_sentiment_overall(articles):
         'overall_sentiment': overall_sentiment
     }
 
-# 4. Word Cloud Visualization
-def generate_wordcloud_from_all_articles(articles):
+# 4. Story Clustering Across Outlets
+def find_stories(articles, clusterer=None):
+    """
+    Groups articles that report the same story, across outlets, and scores
+    each story's sentiment. A clusterer already holding the articles (e.g. the
+    stored history's) is reused; otherwise the articles are clustered now.
+    Returns the stories, most widely covered first.
+    """
+    from story_clusters import cluster_articles, story_sentiment
+    if clusterer is None:
+        clusterer = cluster_articles(articles)
+    return story_sentiment(clusterer.stories(articles))
+
+def print_stories(stories, limit=10):
+    """
+    Prints the stories covered by more than one outlet, with every outlet's headline.
+    """
+    shared = [story for story in stories if len(story['sources']) > 1]
+    print(f"\n{len(stories)} unique stories, {len(shared)} covered by more than one outlet.")
+    for i, story in enumerate(shared[:limit], 1):
+        print(f"\n{i}. {story['headline']} ({story['sentiment']}, {story['compound']:+.2f})")
+        for article in story['articles']:
+            print(f"   - [{article.get('source') or 'unknown'}] {article['headline']}")
+
+# 5. Word Cloud Visualization
+def generate_wordcloud_from_all_articles(articles, save_path=None, show=True):
     """
     Generates a word cloud from the headlines and summaries of all articles.
+    The image is saved to save_path if given; show=False skips the window.
     """
-    # Combine all headlines and summaries into a single text corpus
-    combined_text = ' '.join(
-        article['headline'] + ' ' + (article['summary'] or '') for article in articles
-    )
-    
-    # Clean and tokenize the combined text
-    tokens = word_tokenize(combined_text.lower())
-    tokens = [word for word in tokens if word.isalpha()]  # Keep only alphabetic words
-    tokens = [word for word in tokens if word not in stopwords.words('english')]  # Remove stopwords
+    # Reuse the tokens keyword extraction already computed for these articles
+    tokens = all_tokens(articles)
     
     # Join tokens back into a string for word cloud generation
     cleaned_text = ' '.join(tokens)
     
     # Generate and display the word cloud
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(cleaned_text)
+    import matplotlib.pyplot as plt
+    from wordcloud import WordCloud
+    with instrumentation.timer('wordcloud'):
+        wordcloud = WordCloud(width=800, height=400, background_color='white').generate(cleaned_text)
     
     # Plot the word cloud
     plt.figure(figsize=(10, 5))
     plt.imshow(wordcloud, interpolation='bilinear')
     plt.axis('off')
-    plt.show()
-    
-def user_interface():
+    if save_path:
+        plt.savefig(save_path)
+    if show:
+        plt.show()
+    plt.close()
+    
+# NLTK data each analysis needs. It is checked before the analysis runs, so
+# missing data only stops the analyses that use it
+ANALYSIS_RESOURCES = {
+    'sentiment': ('vader_lexicon',),
+    'keywords': ('punkt_tab', 'stopwords'),
+    'stories': ('vader_lexicon',),
+    'wordcloud': ('punkt_tab', 'stopwords'),
+}
+
+# Analyses behind each choice of the analysis menu
+MENU_ANALYSES = {
+    '1': ('sentiment',),
+    '2': ('sentiment',),
+    '3': ('keywords',),
+    '4': ('wordcloud',),
+    '5': ('stories', 'keywords'),
+}
+
+def missing_data(*analyses):
+    """
+    Returns why the given analyses cannot run (the NLTK data they need is
+    not installed), or None if they can.
+    """
+    try:
+        ensure(*{name for analysis in analyses for name in ANALYSIS_RESOURCES[analysis]})
+    except LookupError as e:
+        return str(e)
+    return None
+
+def analysis_menu(all_articles, keyword_counter=None, show_stats=False, story_clusterer=None):
+    """
+    Menu of analyses to run on a list of scraped articles.
+    keyword_counter holds running keyword counts to use instead of counting
+    all_articles again, e.g. the counts over the stored history; likewise
+    story_clusterer holds story clusters that already include all_articles.
+    show_stats prints the time spent per stage after each analysis.
+    """
+    while True:
+        print("\n--- Analyze Articles ---")
+        print("1. Perform sentiment analysis on a specific article")
+        print("2. Perform overall sentiment analysis on all articles")
+        print("3. Extract keywords")
+        print("4. Generate word cloud from all articles")
+        print("5. Group stories across outlets and analyze each story once")
+        print("6. Back to main menu")
+        
+        analysis_choice = input("Enter your choice: ")
+        
+        reason = missing_data(*MENU_ANALYSES.get(analysis_choice, ()))
+        if reason:
+            print(reason)
+            continue
+        
+        if analysis_choice == '1':
+            # Sentiment analysis for a specific article
+            article_headlines = [article['headline'] for article in all_articles]
+            print("Select an article to analyze:")
+            for i, headline in enumerate(article_headlines, 1):
+                print(f"{i}. {headline}")
+            article_idx = int(input("Enter article number: "))
+            text = all_articles[article_idx - 1]['summary'] or all_articles[article_idx - 1]['headline']
+            sentiment = analyze_sentiment(text)
+            print(f"Sentiment Analysis: {sentiment}")
+        
+        elif analysis_choice == '2':
+            # Overall sentiment analysis for all articles
+            if all_articles:
+                print("\nPerforming overall sentiment analysis on all articles...")
+                sentiment_summary = analyze_sentiment_overall(all_articles)
+                print(f"\nOverall Sentiment Analysis:\n")
+                print(f"Positive articles: {sentiment_summary['positive']}")
+                print(f"Negative articles: {sentiment_summary['negative']}")
+                print(f"Neutral articles: {sentiment_summary['neutral']}")
+                print(f"Overall Sentiment: {sentiment_summary['overall_sentiment']}")
+            else:
+                print("No articles available for sentiment analysis.")
+        
+        elif analysis_choice == '3':
+            # Keyword extraction from all articles
+            if all_articles:
+                window = None
+                if keyword_counter is not None:
+                    window = input("Time window (hour, day, week, or blank for all): ").strip() or None
+                    if window not in (None, 'hour', 'day', 'week'):
+                        print("Invalid window, using all articles.")
+                        window = None
+                print("\nExtracting keywords from all articles and generating bar chart...")
+                keywords = get_keywords_from_all_articles(all_articles, keyword_counter, window)
+                print(f"Top Keywords from All Articles: {keywords}")
+            else:
+                print("No articles available for keyword extraction.")
+        
+        elif analysis_choice == '4':
+            # Word cloud generation from all articles
+            print("\nGenerating word cloud from all articles...")
+            generate_wordcloud_from_all_articles(all_articles)
+        
+        elif analysis_choice == '5':
+            # The same story from several outlets only counts once
+            if all_articles:
+                stories = find_stories(all_articles, story_clusterer)
+                print_stories(stories)
+                unique_articles = [story['articles'][0] for story in stories]
+                sentiment_summary = analyze_sentiment_overall(unique_articles)
+                print(f"\nSentiment by story: {sentiment_summary['positive']} positive, "
+                      f"{sentiment_summary['negative']} negative, {sentiment_summary['neutral']} neutral "
+                      f"({sentiment_summary['overall_sentiment']})")
+                counter = KeywordCounter()
+                counter.add_many(unique_articles)
+                print(f"Top Keywords by story: {counter.top_k(10)}")
+            else:
+                print("No articles available for story clustering.")
+        
+        elif analysis_choice == '6':
+            break
+        
+        else:
+            print("Invalid choice, please try again.")
+            continue
+        
+        if show_stats:
+            print(instrumentation.summary_line())
+
+def select_websites():
+    """
+    Asks the user which websites to scrape.
+    """
+    print("Select websites to scrape (enter numbers separated by commas):")
+    for i, site in enumerate(websites, 1):
+        print(f"{i}. {site}")
+    site_numbers = input("Enter website numbers: ")
+    return [websites[int(i) - 1] for i in site_numbers.split(',')]
+
+def user_interface(show_stats=False):
     """
     CLI for user interaction to choose actions like scraping websites or analyzing text.
+    show_stats prints the time spent per stage after each step.
     """
     all_articles = []
     
     while True:
         print("\n--- News Analyzer Menu ---")
         print("1. Scrape websites")
-        print("2. Exit")
+        print("2. Replay saved snapshots (offline)")
+        print("3. Analyze stored article history")
+        print("4. Exit")
         
         choice = input("Enter your choice: ")
         
         if choice == '1':
             # Scrape websites
-            print("Select websites to scrape (enter numbers separated by commas):")
-            for i, site in enumerate(websites, 1):
-                print(f"{i}. {site}")
-            site_numbers = input("Enter website numbers: ")
-            selected_sites = [websites[int(i) - 1] for i in site_numbers.split(',')]
+            selected_sites = select_websites()
             print(f"Scraping {', '.join(selected_sites)}...")
+            set_offline(False)
+            all_articles, new_articles = scrape_and_store(selected_sites)
+            print(f"Scraped {len(all_articles)} articles ({len(new_articles)} new).")
+            if show_stats:
+                print(instrumentation.summary_line())
+            analysis_menu(all_articles, show_stats=show_stats)
+        
+        elif choice == '2':
+            # Run the analyses on the pages cached by earlier scrapes, without network
+            selected_sites = select_websites()
+            print(f"Replaying {', '.join(selected_sites)} from cache...")
+            set_offline(True)
             all_articles = scrape_websites(selected_sites)
-            print(f"Scraped {len(all_articles)} articles.")
-            
-            while True:
-                print("\n--- Analyze Articles ---")
-                print("1. Perform sentiment analysis on a specific article")
-                print("2. Perform overall sentiment analysis on all articles")
-                print("3. Extract keywords")
-                print("4. Generate word cloud from all articles")
-                print("5. Back to main menu")
-                
-                analysis_choice = input("Enter your choice: ")
-                
-                if analysis_choice == '1':
-                    # Sentiment analysis for a specific article
-                    article_headlines = [article['headline'] for article in all_articles]
-                    print("Select an article to analyze:")
-                    for i, headline in enumerate(article_headlines, 1):
-                        print(f"{i}. {headline}")
-                    article_idx = int(input("Enter article number: "))
-                    text = all_articles[article_idx - 1]['summary'] or all_articles[article_idx - 1]['headline']
-                    sentiment = analyze_sentiment(text)
-                    print(f"Sentiment Analysis: {sentiment}")
-                
-                elif analysis_choice == '2':
-                    # Overall sentiment analysis for all articles
-                    if all_articles:
-                        print("\nPerforming overall sentiment analysis on all articles...")
-                        sentiment_summary = analyze_sentiment_overall(all_articles)
-                        print(f"\nOverall Sentiment Analysis:\n")
-                        print(f"Positive articles: {sentiment_summary['positive']}")
-                        print(f"Negative articles: {sentiment_summary['negative']}")
-                        print(f"Neutral articles: {sentiment_summary['neutral']}")
-                        print(f"Overall Sentiment: {sentiment_summary['overall_sentiment']}")
-                    else:
-                        print("No articles available for sentiment analysis.")
-                
-                elif analysis_choice == '3':
-                    # Keyword extraction from all articles
-                    if all_articles:
-                        print("\nExtracting keywords from all articles and generating bar chart...")
-                        keywords = get_keywords_from_all_articles(all_articles)
-                        print(f"Top Keywords from All Articles: {keywords}")
+            print(f"Loaded {len(all_articles)} articles from saved snapshots.")
+            if show_stats:
+                print(instrumentation.summary_line())
+            analysis_menu(all_articles, show_stats=show_stats)
+        
+        elif choice == '3':
+            # Analyze everything scraped so far, without scraping again
+            days = input("Only articles first seen in the last N days (leave blank for all): ")
+            since = time.time() - float(days) * 86400 if days.strip() else None
+            all_articles = get_store().load(since=since)
+            print(f"Loaded {len(all_articles)} stored articles.")
+            if all_articles:
+                # The running counts cover the whole history, so a shorter span is counted afresh
+                keyword_counter = None
+                if missing_data('keywords') is None:
+                    if since is None:
+                        keyword_counter = get_store().keyword_counter()
                     else:
-                        print("No articles available for keyword extraction.")
-                
-                elif analysis_choice == '4':
-                    # Word cloud generation from all articles
-                    print("\nGenerating word cloud from all articles...")
-                    generate_wordcloud_from_all_articles(all_articles)
-                
-                elif analysis_choice == '5':
-                    break
-                
-                else:
-                    print("Invalid choice, please try again.")
+                        keyword_counter = KeywordCounter(dedupe=True)
+                        keyword_counter.add_many(all_articles)
+                analysis_menu(all_articles, keyword_counter, show_stats,
+                              get_store().story_clusterer())
         
-        elif choice == '2':
+        elif choice == '4':
             print("Exiting...")
             break
         
         else:
             print("Invalid choice, please try again.")
+
+# 6. Headless batch and daemon mode
+ANALYSES = ('sentiment', 'keywords', 'stories', 'wordcloud')
+FORMATS = ('json', 'csv')
+
+# Daemon defaults: poll every 15 minutes, give or take 10%
+DEFAULT_INTERVAL = 900
+DEFAULT_JITTER = 0.1
+
+def resolve_sites(names):
+    """
+    Map site arguments to registry urls. A site may be given by its url, its
+    scraper name or any unique part of either (e.g. 'bbc').
+    """
+    if not names:
+        return list(websites)
+    resolved = []
+    for name in names:
+        matches = [spec['url'] for spec in SITES
+                   if name in (spec['url'], spec['name']) or name.lower() in spec['url'].lower()]
+        if len(matches) != 1:
+            raise ValueError(f"Unknown or ambiguous site: {name}")
+        resolved.append(matches[0])
+    return resolved
+
+def write_json(path, data):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+def write_csv(path, rows, fields):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        writer.writerows(rows)
+
+def article_rows(articles):
+    """
+    Articles as flat records with their sentiment, for JSON/CSV output. The
+    sentiment is left empty when the VADER lexicon is not installed.
+    """
+    if missing_data('sentiment') is None:
+        scores = sentiment.score_many([article['summary'] or article['headline'] for article in articles])
+    else:
+        scores = [{'compound': None}] * len(articles)
+    return [{
+        'headline': article['headline'],
+        'summary': article['summary'],
+        'link': article.get('link'),
+        'source': article.get('source'),
+        'compound': score['compound'],
+        'sentiment': sentiment.classify(score['compound']) if score['compound'] is not None else None,
+    } for article, score in zip(articles, scores)]
+
+def run_analyses(articles, analyses, output_dir, formats, keyword_counter=None, window=None,
+                 charts=True, story_clusterer=None):
+    """
+    Run the selected analyses on articles and write their results to
+    output_dir. keyword_counter, window and story_clusterer work as in the
+    interactive menu. Analyses whose NLTK data is missing are skipped and
+    listed under 'skipped' with the reason.
+    Returns the results as a dictionary.
+    """
+    results = {'articles': len(articles)}
+    skipped = {}
+    for analysis in analyses:
+        reason = missing_data(analysis)
+        if reason:
+            print(f"Skipping {analysis}: {reason}")
+            skipped[analysis] = reason
+    if skipped:
+        results['skipped'] = skipped
+        analyses = [analysis for analysis in analyses if analysis not in skipped]
+    rows = article_rows(articles)
+    if 'json' in formats:
+        write_json(os.path.join(output_dir, 'articles.json'), rows)
+    if 'csv' in formats:
+        write_csv(os.path.join(output_dir, 'articles.csv'), rows,
+                  ['headline', 'summary', 'link', 'source', 'compound', 'sentiment'])
+
+    if 'sentiment' in analyses and articles:
+        results['sentiment'] = analyze_sentiment_overall(articles)
+
+    if 'keywords' in analyses and (articles or keyword_counter is not None):
+        chart = os.path.join(output_dir, 'keywords.png') if charts else None
+        keywords = get_keywords_from_all_articles(articles, keyword_counter, window,
+                                                  save_path=chart, show=False)
+        results['keywords'] = [{'keyword': k, 'count': c} for k, c in keywords]
+        if 'csv' in formats:
+            write_csv(os.path.join(output_dir, 'keywords.csv'), results['keywords'], ['keyword', 'count'])
+
+    if 'stories' in analyses and articles:
+        stories = find_stories(articles, story_clusterer)
+        story_rows = [{
+            'headline': story['headline'],
+            'sources': story['sources'],
+            'articles': len(story['articles']),
+            'compound': story['compound'],
+            'sentiment': story['sentiment'],
+            'headlines': [article['headline'] for article in story['articles']],
+        } for story in stories]
+        results['stories'] = {
+            'unique': len(stories),
+            'multi_source': sum(1 for story in stories if len(story['sources']) > 1),
+            'sentiment': analyze_sentiment_overall([story['articles'][0] for story in stories]),
+        }
+        if 'json' in formats:
+            write_json(os.path.join(output_dir, 'stories.json'), story_rows)
+        if 'csv' in formats:
+            write_csv(os.path.join(output_dir, 'stories.csv'),
+                      [dict(row, sources='; '.join(row['sources']), headlines=' | '.join(row['headlines']))
+                       for row in story_rows],
+                      ['headline', 'sources', 'articles', 'compound', 'sentiment', 'headlines'])
+
+    if 'wordcloud' in analyses and charts and all_tokens(articles):
+        generate_wordcloud_from_all_articles(articles, save_path=os.path.join(output_dir, 'wordcloud.png'),
+                                             show=False)
+
+    if 'json' in formats:
+        write_json(os.path.join(output_dir, 'results.json'), results)
+    return results
+
+def scrape_and_store(sites):
+    """Scrape sites and store the articles. Returns (all articles, new articles)."""
+    all_articles = scrape_websites(sites)
+    # Keep every article in the store, then score the ones still unscored
+    new_articles = get_store().ingest(all_articles)
+    try:
+        get_store().score_new()
+    except LookupError as e:
+        # The articles stay stored; a later scrape scores them once the data is installed
+        print(f"Sentiment not scored: {e}")
+    return all_articles, new_articles
+
+def run_batch(args):
+    """Scrape once, run the analyses and write the results."""
+    all_articles, new_articles = scrape_and_store(args.sites)
+    print(f"Scraped {len(all_articles)} articles ({len(new_articles)} new).")
+    run_analyses(all_articles, args.analyses, args.output_dir, args.formats,
+                 charts=not args.no_charts)
+    if args.stats:
+        print(instrumentation.summary_line())
+
+def run_daemon(args):
+    """
+    Re-scrape the sites every interval (with random jitter so polls do not
+    line up with other schedules) until interrupted. Each tick only scores
+    and counts the articles that are new; keyword counts are the running
+    counts over the whole stored history, optionally limited to a window,
+    and stories are clustered against the whole history too.
+    After every tick the stage timings and counters are written to the
+    metrics file in the Prometheus text format.
+    """
+    metrics_file = args.metrics_file or os.path.join(args.output_dir, 'metrics.prom')
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    keyword_counter = None
+    if 'keywords' in args.analyses and missing_data('keywords') is None:
+        keyword_counter = get_store().keyword_counter()
+    story_clusterer = get_store().story_clusterer() if 'stories' in args.analyses else None
+
+    ticks = 0
+    while not stop.is_set():
+        started = time.time()
+        try:
+            all_articles, new_articles = scrape_and_store(args.sites)
+            tick = {'time': started, 'articles': len(all_articles), 'new': len(new_articles)}
+            # Charts only change when there is something new to draw
+            results = run_analyses(all_articles, args.analyses, args.output_dir, args.formats,
+                                   keyword_counter, args.window,
+                                   charts=not args.no_charts and bool(new_articles or ticks == 0),
+                                   story_clusterer=story_clusterer)
+            tick.update(results)
+            with open(os.path.join(args.output_dir, 'ticks.jsonl'), 'a', encoding='utf-8') as f:
+                f.write(json.dumps(tick, ensure_ascii=False) + '\n')
+            print(f"{time.strftime('%Y-%m-%d %H:%M:%S')} scraped {len(all_articles)} articles "
+                  f"({len(new_articles)} new)")
+        except Exception as e:
+            instrumentation.count('poll_errors')
+            print(f"Poll failed: {e}")
+        instrumentation.count('polls')
+        instrumentation.write_prometheus(metrics_file)
+        if args.stats:
+            print(instrumentation.summary_line())
+
+        ticks += 1
+        if args.max_ticks and ticks >= args.max_ticks:
+            break
+        delay = args.interval * (1 + random.uniform(-args.jitter, args.jitter))
+        stop.wait(max(delay - (time.time() - started), 0))
+
+def main(argv=None):
+    """
+    Entry point. Without arguments the interactive menu runs; --batch and
+    --daemon run unattended and write their results to --output-dir.
+    """
+    parser = argparse.ArgumentParser(description="Scrape news sites and analyze the headlines.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--batch', action='store_true', help="scrape once, write the results and exit")
+    mode.add_argument('--daemon', action='store_true', help="keep polling the sites on a schedule")
+    parser.add_argument('--sites', nargs='+', help="sites to scrape (url, name or part of it); default all")
+    parser.add_argument('--analyses', nargs='+', choices=ANALYSES, default=list(ANALYSES))
+    parser.add_argument('--formats', nargs='+', choices=FORMATS, default=['json'])
+    parser.add_argument('--output-dir', default='news_analyzer_output')
+    parser.add_argument('--no-charts', action='store_true', help="do not write PNG charts")
+    parser.add_argument('--offline', action='store_true', help="replay saved snapshots instead of the network")
+    parser.add_argument('--window', choices=['hour', 'day', 'week'],
+                        help="keyword window in daemon mode (default: all stored history)")
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help="seconds between polls")
+    parser.add_argument('--jitter', type=float, default=DEFAULT_JITTER,
+                        help="random fraction of the interval added or removed per poll")
+    parser.add_argument('--max-ticks', type=int, help="stop the daemon after this many polls")
+    parser.add_argument('--metrics-file', help="Prometheus metrics file of the daemon "
+                                               "(default: metrics.prom in the output directory)")
+    parser.add_argument('--stats', action='store_true', help="print the time spent per stage")
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'],
+                        help="profile the run (also set by NEWS_ANALYZER_PROFILE)")
+    args = parser.parse_args(argv)
+
+    with instrumentation.profiling('newsanalyzerCLI', args.profile):
+        run_mode(parser, args)
+
+def run_mode(parser, args):
+    """Run the interactive menu, a batch or the daemon, as chosen by the arguments."""
+    if not (args.batch or args.daemon):
+        user_interface(args.stats)
+        return
+
+    try:
+        args.sites = resolve_sites(args.sites)
+    except ValueError as e:
+        parser.error(str(e))
+    os.makedirs(args.output_dir, exist_ok=True)
+    set_offline(args.offline)
+
+    # Charts are only ever written to files
+    import matplotlib
+    matplotlib.use('Agg')
+
+    if args.batch:
+        run_batch(args)
+    else:
+        try:
+            run_daemon(args)
+        except KeyboardInterrupt:
+            print("Stopped.")
             
 if __name__ == '__main__':
-    user_interface()
+    main()
@@ -0,0 +1,64 @@
+"""
+NLTK data needed by the analyzers, checked lazily and locally.
+
+Nothing is downloaded at startup: a resource is looked up with nltk.data.find
+the first time a feature needs it. A bundled or offline copy of the data can
+be used by pointing NEWS_ANALYZER_NLTK_DATA at it; missing data is only
+downloaded when NEWS_ANALYZER_NLTK_DOWNLOAD is set (into that directory if
+given), otherwise a LookupError explains what to install.
+"""
+import os
+import threading
+
+# Extra directory searched first for NLTK data, e.g. one shipped with the app
+NLTK_DATA_DIR = os.environ.get('NEWS_ANALYZER_NLTK_DATA')
+
+# Whether missing data may be fetched from the network
+ALLOW_DOWNLOAD = os.environ.get('NEWS_ANALYZER_NLTK_DOWNLOAD', '').lower() in ('1', 'true', 'yes')
+
+# Package name -> path nltk.data.find looks it up by
+RESOURCES = {
+    'punkt_tab': 'tokenizers/punkt_tab/english/',
+    'stopwords': 'corpora/stopwords',
+    'vader_lexicon': 'sentiment/vader_lexicon.zip',
+}
+
+_found = set()
+_lock = threading.Lock()
+
+
+def _add_data_dir(nltk):
+    if NLTK_DATA_DIR and NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+
+
+def ensure(*names):
+    """
+    Make sure the named NLTK packages are available locally, checking each
+    one only once per process.
+    """
+    with _lock:
+        missing = [name for name in names if name not in _found]
+        if not missing:
+            return
+
+        import nltk
+        _add_data_dir(nltk)
+        for name in missing:
+            try:
+                nltk.data.find(RESOURCES[name])
+            except LookupError:
+                if not ALLOW_DOWNLOAD:
+                    raise LookupError(
+                        f"NLTK resource '{name}' was not found. Install it with "
+                        f"python -m nltk.downloader {name}, point NEWS_ANALYZER_NLTK_DATA "
+                        f"at a directory containing it, or set NEWS_ANALYZER_NLTK_DOWNLOAD=1."
+                    ) from None
+                nltk.download(name, download_dir=NLTK_DATA_DIR, quiet=True)
+                nltk.data.find(RESOURCES[name])
+            _found.add(name)
+
+
+def ensure_all():
+    """Check every resource up front, e.g. before a long batch run."""
+    ensure(*RESOURCES)
@@ -0,0 +1,162 @@
+"""
+Pluggable HTML parse backends for the scrapers.
+
+Front pages are several hundred KB but only a few dozen headline elements
+matter, so pages are parsed partially: only the subtrees rooted at the
+elements a site's selectors start from are materialized. Backends, fastest
+first:
+
+- selectolax: locates the root elements with its C parser and hands only
+  their HTML to BeautifulSoup. It cannot build a full BeautifulSoup tree, so
+  whole-page parses use the next backend instead. It reads bytes as UTF-8,
+  so pages are decoded first the way BeautifulSoup would (<meta charset>,
+  then detection).
+- lxml: BeautifulSoup's lxml tree builder with a SoupStrainer.
+- html.parser: the standard library parser with a SoupStrainer.
+
+selectolax and lxml are optional; NEWS_ANALYZER_PARSER picks a backend
+explicitly, otherwise the fastest installed one is used. Pages whose
+selectors can match outside their root elements (sibling combinators,
+pseudo-classes) are always parsed whole.
+"""
+import importlib.util
+import os
+import re
+
+from bs4 import BeautifulSoup, SoupStrainer, UnicodeDammit
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    try:
+        # selectolax < 0.3.13 only ships the Modest engine
+        from selectolax.parser import HTMLParser
+    except ImportError:
+        HTMLParser = None
+
+HAVE_LXML = importlib.util.find_spec('lxml') is not None
+
+# First compound of a selector: tag name, classes and attribute presence/value
+_ROOT_RE = re.compile(r'^([a-zA-Z][\w-]*)?((?:\.[\w-]+)*)((?:\[[^\]]+\])*)')
+_ATTR_RE = re.compile(r'\[\s*([\w-]+)\s*(?:=\s*["\']?([^"\'\]]*)["\']?)?\s*\]')
+
+# Selectors made of tag, id, class and attribute tests joined by descendant
+# or child combinators: everything they match lies inside their first compound
+_COMPOUND = r'(?:[a-zA-Z][\w-]*|\*)?(?:[.#][\w-]+|\[[^\]]+\])*'
+_TARGETABLE_RE = re.compile(rf'^\s*({_COMPOUND})(?:\s*>\s*{_COMPOUND}|\s+{_COMPOUND})*\s*$')
+
+
+def available_backends():
+    """Return the backends that can run in this environment, fastest first."""
+    backends = []
+    if HTMLParser is not None:
+        backends.append('selectolax')
+    if HAVE_LXML:
+        backends.append('lxml')
+    backends.append('html.parser')
+    return backends
+
+
+def get_backend():
+    """Return the backend chosen by NEWS_ANALYZER_PARSER, or the fastest installed."""
+    requested = os.environ.get('NEWS_ANALYZER_PARSER', 'auto')
+    available = available_backends()
+    if requested in available:
+        return requested
+    if requested not in ('auto', ''):
+        print(f"Parser backend '{requested}' is not available, using {available[0]}.")
+    return available[0]
+
+
+def root_selector(selector):
+    """
+    Return the first compound selector of a selector, e.g. 'h2.title' for
+    'h2.title a', so that every element the selector can match lives inside
+    an element matching its root. Returns None when there is no such root:
+    sibling combinators ('h2 + p', 'h2 ~ p'), pseudo-classes and selector
+    groups can match elements outside it.
+    """
+    match = _TARGETABLE_RE.match(selector)
+    if not match or not match.group(1):
+        return None
+    return match.group(1)
+
+
+def _parse_root(root):
+    match = _ROOT_RE.match(root)
+    name = match.group(1)
+    classes = [c for c in match.group(2).split('.') if c]
+    attrs = {key: value if value else True for key, value in _ATTR_RE.findall(match.group(3))}
+    return name, classes, attrs
+
+
+def make_strainer(roots):
+    """
+    Build a SoupStrainer letting through the elements matching any of the
+    root selectors. A SoupStrainer can only OR values of a single attribute,
+    so when the roots filter on different attributes only the tag names are
+    used; the CSS selectors still narrow the result down afterwards.
+    """
+    parsed = [_parse_root(root) for root in roots]
+    names = sorted({name for name, _, _ in parsed if name})
+    if any(name is None for name, _, _ in parsed):
+        names = None
+        if any(not classes and not attrs for _, classes, attrs in parsed):
+            # A root like '*' can match anything, so nothing can be skipped
+            return None
+
+    keys = {('class' if classes else None, *attrs) for _, classes, attrs in parsed}
+    if len(keys) == 1:
+        key = next(iter(keys))
+        if key == ('class',):
+            # Match single classes inside multi-valued class attributes
+            classes = sorted({c for _, cs, _ in parsed for c in cs})
+            pattern = re.compile(r'(?:^|\s)(?:%s)(?:\s|$)' % '|'.join(map(re.escape, classes)))
+            return SoupStrainer(names, attrs={'class': pattern})
+        if len(key) == 2 and key[0] is None:
+            values = {attrs[key[1]] for _, _, attrs in parsed}
+            value = True if True in values else sorted(values)
+            return SoupStrainer(names, attrs={key[1]: value})
+    return SoupStrainer(names) if names else None
+
+
+def _outermost(nodes):
+    """Drop selectolax nodes nested inside another matched node."""
+    kept = []
+    for node in nodes:
+        if kept and _is_inside(node, kept[-1]):
+            continue
+        kept.append(node)
+    return kept
+
+
+def _is_inside(node, ancestor):
+    parent = node.parent
+    while parent is not None:
+        if parent.mem_id == ancestor.mem_id:
+            return True
+        parent = parent.parent
+    return False
+
+
+def parse_page(content, roots=None, backend=None):
+    """
+    Parse page content into a BeautifulSoup tree holding only the subtrees
+    rooted at elements matching roots (the whole page if roots is None).
+    """
+    backend = backend or get_backend()
+
+    if backend == 'selectolax':
+        if roots is None:
+            # Only targeted parses go through selectolax
+            backend = 'lxml' if HAVE_LXML else 'html.parser'
+            return BeautifulSoup(content, backend)
+        if isinstance(content, bytes):
+            content = UnicodeDammit(content, is_html=True).unicode_markup
+        tree = HTMLParser(content)
+        # css() returns matches in document order, so nested matches follow their ancestor
+        nodes = _outermost(tree.css(', '.join(roots)))
+        return BeautifulSoup(''.join(node.html for node in nodes), 'html.parser')
+
+    parse_only = make_strainer(roots) if roots is not None else None
+    return BeautifulSoup(content, backend, parse_only=parse_only)
@@ -0,0 +1,152 @@
+"""
+Shared VADER sentiment scoring. One analyzer is kept for the life of the
+process and scores are cached by a hash of the normalized text, so the
+article dialog, the overall summary and the per-article option never score
+the same headline twice.
+"""
+import hashlib
+import multiprocessing
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import instrumentation
+from nltk_resources import ensure
+
+# Number of distinct texts whose scores are remembered (least recently used go first)
+SCORE_CACHE_SIZE = 50_000
+
+# Batches with more uncached texts than this are scored in a process pool
+PARALLEL_THRESHOLD = 5_000
+CHUNK_SIZE = 1_000
+
+# Compound score thresholds used by VADER's authors
+POSITIVE_THRESHOLD = 0.05
+NEGATIVE_THRESHOLD = -0.05
+
+_analyzer = None
+_cache = OrderedDict()
+_lock = threading.Lock()
+
+
+def get_analyzer():
+    """Return the process-wide analyzer, loading NLTK and the VADER lexicon on first use."""
+    global _analyzer
+    with _lock:
+        if _analyzer is None:
+            ensure('vader_lexicon')
+            from nltk.sentiment import SentimentIntensityAnalyzer
+            _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+def normalize(text):
+    """
+    Collapse runs of whitespace. VADER splits on whitespace and reads case
+    and punctuation, so nothing else may change without changing the score.
+    """
+    return ' '.join(text.split())
+
+
+def text_key(text):
+    return hashlib.blake2b(normalize(text).encode('utf-8'), digest_size=16).digest()
+
+
+def _cache_get(key):
+    with _lock:
+        scores = _cache.get(key)
+        if scores is not None:
+            _cache.move_to_end(key)
+        return scores
+
+
+def _cache_put(key, scores):
+    with _lock:
+        _cache[key] = scores
+        _cache.move_to_end(key)
+        while len(_cache) > SCORE_CACHE_SIZE:
+            _cache.popitem(last=False)
+
+
+def score(text):
+    """Return VADER's polarity scores for a text."""
+    key = text_key(text)
+    scores = _cache_get(key)
+    if scores is None:
+        with instrumentation.timer('sentiment'):
+            scores = get_analyzer().polarity_scores(normalize(text))
+        _cache_put(key, scores)
+    else:
+        instrumentation.count('cache_hits', kind='sentiment')
+    return dict(scores)
+
+
+def remember(text, scores):
+    """Seed the cache with scores computed earlier, e.g. loaded from the article store."""
+    _cache_put(text_key(text), dict(scores))
+
+
+def _init_worker():
+    # Each worker process loads its own analyzer once, before any chunk
+    get_analyzer()
+
+
+def _score_chunk(texts):
+    analyzer = get_analyzer()
+    return [analyzer.polarity_scores(text) for text in texts]
+
+
+def score_many(texts, processes=None):
+    """
+    Return the polarity scores of each text, in order. Cached texts are not
+    scored again; when a batch has more than PARALLEL_THRESHOLD new texts
+    they are split across a process pool. The pool's workers are spawned,
+    not forked: callers run on several threads (the GUI's thread pool), and
+    a child forked while another thread holds _lock would block forever.
+    """
+    keys = [text_key(text) for text in texts]
+    results = [_cache_get(key) for key in keys]
+    hits = sum(scores is not None for scores in results)
+
+    # Texts to score, deduplicated so repeated headlines are scored once
+    pending = {}
+    for key, text, scores in zip(keys, texts, results):
+        if scores is None and key not in pending:
+            pending[key] = normalize(text)
+
+    if pending:
+        start = time.perf_counter()
+        pending_texts = list(pending.values())
+        if len(pending_texts) > PARALLEL_THRESHOLD:
+            chunks = [pending_texts[i:i + CHUNK_SIZE]
+                      for i in range(0, len(pending_texts), CHUNK_SIZE)]
+            # Report missing data here rather than as a broken pool
+            ensure('vader_lexicon')
+            with ProcessPoolExecutor(max_workers=processes or os.cpu_count(),
+                                     mp_context=multiprocessing.get_context('spawn'),
+                                     initializer=_init_worker) as pool:
+                scored = [s for chunk in pool.map(_score_chunk, chunks) for s in chunk]
+        else:
+            scored = _score_chunk(pending_texts)
+        instrumentation.record('sentiment', time.perf_counter() - start)
+
+        new_scores = dict(zip(pending, scored))
+        for key, scores in new_scores.items():
+            _cache_put(key, scores)
+        results = [scores if scores is not None else new_scores[key]
+                   for key, scores in zip(keys, results)]
+
+    # Only texts found in the cache count, once scoring has succeeded
+    instrumentation.count('cache_hits', hits, kind='sentiment')
+    return [dict(scores) for scores in results]
+
+
+def classify(compound):
+    """Return 'positive', 'negative' or 'neutral' for a compound score."""
+    if compound >= POSITIVE_THRESHOLD:
+        return 'positive'
+    if compound <= NEGATIVE_THRESHOLD:
+        return 'negative'
+    return 'neutral'
@@ -0,0 +1,195 @@
+"""
+Declarative site registry. Each news source is described by its url, the CSS
+selectors that locate headlines and the extractors/filters applied to each
+match; one generic extractor turns any entry into a scraper.
+"""
+import hashlib
+import json
+
+import soupsieve
+
+from fetcher import scraper
+from parse_backend import parse_page, root_selector
+
+
+# Field extractors: each takes a matched tag and returns a string or None
+def text_of(tag):
+    """Text of the tag with every piece of whitespace stripped."""
+    return tag.get_text(strip=True)
+
+
+def raw_text_of(tag):
+    """Text of the tag with only the outer whitespace stripped."""
+    return tag.text.strip()
+
+
+def href_of(tag):
+    return tag.get('href')
+
+
+def attr(name):
+    """Extractor returning the stripped value of an attribute."""
+    def extract(tag):
+        value = tag.get(name)
+        return value.strip() if value is not None else None
+    extract.description = f"attr({name!r})"
+    return extract
+
+
+def child(selector, extractor):
+    """Extractor applied to the first descendant matching selector, if any."""
+    pattern = soupsieve.compile(selector)
+
+    def extract(tag):
+        found = pattern.select_one(tag)
+        return extractor(found) if found is not None else None
+    extract.description = f"child({selector!r}, {describe(extractor)})"
+    return extract
+
+
+# Filters: each takes a headline and returns whether to keep it
+def non_empty(headline):
+    return bool(headline)
+
+
+def describe(fn):
+    """
+    Stable description of an extractor or filter: the description the
+    factories above attach, or the function's name and a hash of its code.
+    """
+    if fn is None:
+        return None
+    if hasattr(fn, 'description'):
+        return fn.description
+    code = getattr(fn, '__code__', None)
+    if code is None:
+        return fn.__qualname__
+    consts = [c for c in code.co_consts if not hasattr(c, 'co_code')]
+    body = code.co_code + repr((consts, code.co_names)).encode('utf-8')
+    return f"{fn.__qualname__}:{hashlib.sha1(body).hexdigest()[:12]}"
+
+
+def rule(select, headline=text_of, link=None, skip_first=0, skip_last=0):
+    """
+    One way of finding headlines on a page: a CSS selector, the extractors
+    for the headline and link of every match, and how many matches to drop
+    from the start and end of the page.
+    """
+    return {
+        'select': select,
+        'headline': headline,
+        'link': link,
+        'skip_first': skip_first,
+        'skip_last': skip_last,
+    }
+
+
+def news_site(name, url, rules, fetch_url=None, summary=None, keep=None, dedupe=False,
+         empty_message=None):
+    """
+    Registry entry for a news source.
+    name names the generated scraper function, url is the address shown to
+    the user and fetch_url the page actually downloaded (defaults to url).
+    keep is an optional headline filter and dedupe drops repeated headlines.
+    """
+    return {
+        'name': name,
+        'url': url,
+        'fetch_url': fetch_url or url,
+        'rules': rules,
+        'summary': summary,
+        'keep': keep,
+        'dedupe': dedupe,
+        'empty_message': empty_message,
+    }
+
+
+def spec_digest(spec):
+    """
+    Digest of everything in a registry entry that shapes the articles it
+    extracts. Parsed articles are cached under it, so editing a site's rules
+    makes the cached articles of an unchanged page stale.
+    """
+    rules = [[r['select'], describe(r['headline']), describe(r['link']), r['skip_first'], r['skip_last']]
+             for r in spec['rules']]
+    key = [spec['url'], spec['fetch_url'], spec['summary'], rules, describe(spec['keep']), spec['dedupe']]
+    return hashlib.sha1(json.dumps(key).encode('utf-8')).hexdigest()[:16]
+
+
+def compile_site(spec):
+    """
+    Compile all selectors of an entry into a single selector group, so the
+    document is walked once no matter how many rules the site has.
+    Also returns the root selectors the page parse can be limited to, or
+    None if a selector can match outside its root and the whole page has to
+    be parsed.
+    """
+    patterns = [soupsieve.compile(r['select']) for r in spec['rules']]
+    combined = soupsieve.compile(', '.join(r['select'] for r in spec['rules']))
+    roots = [root_selector(r['select']) for r in spec['rules']]
+    roots = None if None in roots else list(dict.fromkeys(roots))
+    return combined, patterns, roots
+
+
+def parse_site_page(spec, content, compiled=None, backend=None):
+    """Parse only the parts of a page that a site's rules can match."""
+    roots = (compiled or compile_site(spec))[2]
+    return parse_page(content, roots, backend)
+
+
+def extract_articles(spec, soup, compiled=None):
+    """Run a site's rules over a parsed document and return its articles."""
+    combined, patterns, _ = compiled or compile_site(spec)
+
+    # Single pass in document order, bucketed per rule so the output keeps
+    # the rule order of the registry entry
+    matches = [[] for _ in patterns]
+    for tag in combined.select(soup):
+        for i, pattern in enumerate(patterns):
+            if pattern.match(tag):
+                matches[i].append(tag)
+
+    articles = []
+    seen_headlines = set()
+    for r, tags in zip(spec['rules'], matches):
+        tags = tags[r['skip_first']:len(tags) - r['skip_last']]
+        for tag in tags:
+            headline = r['headline'](tag)
+            if headline is None:
+                continue
+            if spec['keep'] and not spec['keep'](headline):
+                continue
+            if spec['dedupe']:
+                if headline in seen_headlines:
+                    continue
+                seen_headlines.add(headline)
+            articles.append({
+                'headline': headline,
+                'summary': spec['summary'],
+                'link': r['link'](tag) if r['link'] else None,
+                'source': spec['url'],
+            })
+
+    if not articles and spec['empty_message']:
+        print(spec['empty_message'])
+    return articles
+
+
+def build_scraper(spec):
+    """Return a zero-argument scraper for a registry entry."""
+    compiled = compile_site(spec)
+
+    def parse(response):
+        if response.status_code != 200:
+            print(f"Failed to retrieve {spec['fetch_url']}. Status code: {response.status_code}")
+            return []
+        soup = parse_site_page(spec, response.content, compiled)
+        return extract_articles(spec, soup, compiled)
+
+    parse.__name__ = parse.__qualname__ = spec['name']
+    return scraper(spec['fetch_url'], key=f"{spec['name']}:{spec_digest(spec)}")(parse)
+
+
+def build_scrapers(sites):
+    """Map each site url in a registry to its scraper."""
+    return {spec['url']: build_scraper(spec) for spec in sites}
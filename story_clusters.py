@@ -0,0 +1,205 @@
+"""
+Near-duplicate headline clustering across outlets.
+
+The same story is published by several sites with slightly different
+wording. Each headline is reduced to a MinHash signature of its words
+(minus a few stopwords, so reworded headlines still match), and an LSH
+index (the signature cut into bands, each band hashed into a bucket) finds
+the earlier headlines likely to be similar without comparing against all
+of them. A headline joins the cluster of its most similar candidate if
+their estimated Jaccard similarity reaches the threshold, otherwise it
+starts a new story. Adding a headline costs one signature plus a few
+bucket lookups, however many headlines came before.
+"""
+import re
+import threading
+import zlib
+
+import numpy as np
+
+import instrumentation
+import sentiment
+from article_store import normalize_headline, sentiment_text
+
+NUM_PERM = 64
+# 16 bands of 4 rows: pairs above ~0.5 similarity almost always share a bucket
+BANDS = 16
+SIMILARITY_THRESHOLD = 0.5
+
+# Only the most recent headlines of a bucket are kept as candidates, so very
+# common bands cannot make lookups linear in the history
+MAX_BUCKET_SIZE = 32
+
+# Words too common in headlines to say anything about the story
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have in into is it its of on or over "
+    "says the to up was were will with".split()
+)
+
+# Universal hashing modulo a prime below 2**31, so products fit in 64 bits
+_PRIME = (1 << 31) - 1
+
+_word = re.compile(r'\w+')
+
+
+def shingles(headline):
+    """Hashes of the distinct words of a headline, ignoring case, punctuation and stopwords."""
+    words = _word.findall(headline.casefold())
+    hashes = {zlib.crc32(w.encode('utf-8')) % _PRIME for w in words if w not in STOPWORDS}
+    return hashes or {zlib.crc32(headline.casefold().encode('utf-8')) % _PRIME}
+
+
+class StoryClusterer:
+    """
+    Incremental clusters of articles that report the same story. Articles
+    may be added on one thread while stories are read on another.
+    """
+
+    def __init__(self, num_perm=NUM_PERM, bands=BANDS, threshold=SIMILARITY_THRESHOLD, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _PRIME, size=(num_perm, 1), dtype=np.uint64)
+        # Random odd multipliers that fold the rows of each band into one key
+        self._fold = rng.integers(1, 1 << 63, size=self.rows, dtype=np.uint64) | np.uint64(1)
+
+        self.articles = []
+        # One row of num_perm 32-bit values per article, grown by doubling
+        self._signatures = np.empty((1024, num_perm), dtype=np.uint32)
+        self._cluster_of = []
+        self.clusters = {}
+        self._buckets = [{} for _ in range(bands)]
+        # Normalized headline -> index, so repeated headlines are not added twice
+        self._seen = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.articles)
+
+    def signature(self, headline):
+        """MinHash signature of a headline, as an array of num_perm values."""
+        x = np.fromiter(shingles(headline), dtype=np.uint64)
+        return ((self._a * x + self._b) % _PRIME).min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, signature):
+        bands = signature.reshape(self.bands, self.rows).astype(np.uint64)
+        return (bands * self._fold).sum(axis=1).tolist()
+
+    def similarity(self, signature, index):
+        """Estimated Jaccard similarity between a signature and a stored article."""
+        with self._lock:
+            return float((self._signatures[index] == signature).mean())
+
+    def add(self, article):
+        """Cluster one article; returns the id of its story."""
+        with self._lock:
+            return self._add(article)
+
+    def _add(self, article):
+        key = normalize_headline(article['headline'])
+        index = self._seen.get(key)
+        if index is not None:
+            return self._cluster_of[index]
+
+        signature = self.signature(article['headline'])
+        band_keys = self._band_keys(signature)
+
+        candidates = set()
+        for buckets, band_key in zip(self._buckets, band_keys):
+            candidates.update(buckets.get(band_key, ()))
+        best = None
+        if candidates:
+            # Compare with every candidate at once; the most similar one wins
+            candidates = np.fromiter(candidates, dtype=np.int64)
+            matches = np.count_nonzero(self._signatures[candidates] == signature, axis=1)
+            i = int(matches.argmax())
+            if matches[i] >= self.threshold * self.num_perm:
+                best = int(candidates[i])
+
+        index = len(self.articles)
+        cluster = self._cluster_of[best] if best is not None else index
+        if index == len(self._signatures):
+            self._signatures = np.concatenate([self._signatures, np.empty_like(self._signatures)])
+        self._signatures[index] = signature
+        self.articles.append(article)
+        self._cluster_of.append(cluster)
+        self.clusters.setdefault(cluster, []).append(index)
+        self._seen[key] = index
+
+        for buckets, band_key in zip(self._buckets, band_keys):
+            bucket = buckets.setdefault(band_key, [])
+            bucket.append(index)
+            if len(bucket) > MAX_BUCKET_SIZE:
+                del bucket[0]
+        return cluster
+
+    def add_many(self, articles):
+        """Cluster a batch of articles; returns their story ids in order."""
+        with instrumentation.timer('clusters'), self._lock:
+            return [self._add(article) for article in articles]
+
+    def cluster_of(self, article):
+        """Story id of an article already added, or None."""
+        with self._lock:
+            return self._story_id(article)
+
+    def _story_id(self, article):
+        index = self._seen.get(normalize_headline(article['headline']))
+        return self._cluster_of[index] if index is not None else None
+
+    def stories(self, articles=None, min_sources=1):
+        """
+        Return the stories as dicts with their first headline, articles and
+        sources, most widely covered first. If articles is given, only the
+        stories and members among those articles are returned.
+        """
+        with self._lock:
+            if articles is None:
+                groups = {cluster: [self.articles[i] for i in members]
+                          for cluster, members in self.clusters.items()}
+            else:
+                groups = {}
+                for article in articles:
+                    cluster = self._story_id(article)
+                    if cluster is not None:
+                        groups.setdefault(cluster, []).append(article)
+
+        stories = []
+        for cluster, members in groups.items():
+            sources = sorted({article.get('source') or '' for article in members})
+            if len(sources) < min_sources:
+                continue
+            stories.append({
+                'id': cluster,
+                'headline': members[0]['headline'],
+                'articles': members,
+                'sources': sources,
+            })
+        stories.sort(key=lambda story: (-len(story['sources']), -len(story['articles']), story['id']))
+        return stories
+
+
+def cluster_articles(articles, **options):
+    """Return a StoryClusterer holding the given articles."""
+    clusterer = StoryClusterer(**options)
+    clusterer.add_many(articles)
+    return clusterer
+
+
+def story_sentiment(stories):
+    """
+    Add the mean compound sentiment of each story's articles as 'compound'
+    and its label as 'sentiment'; returns the stories.
+    """
+    texts = [sentiment_text(article) for story in stories for article in story['articles']]
+    scores = iter(sentiment.score_many(texts))
+    for story in stories:
+        compound = sum(next(scores)['compound'] for _ in story['articles']) / len(story['articles'])
+        story['compound'] = compound
+        story['sentiment'] = sentiment.classify(compound)
+    return stories
@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import text_processing  # noqa: E402
+
+
+@pytest.fixture
+def plain_tokens(monkeypatch):
+    """Tokenize on whitespace with a tiny stopword list, so no NLTK data is needed."""
+    monkeypatch.setattr(text_processing, '_word_tokenize', str.split)
+    monkeypatch.setattr(text_processing, '_stopwords', frozenset({'the', 'a', 'in', 'of'}))
+    text_processing._tokenize_cached.cache_clear()
+    yield
+    text_processing._tokenize_cached.cache_clear()
@@ -0,0 +1,126 @@
+import itertools
+import os
+
+import pytest
+
+import fetcher
+import http_cache
+from http_cache import HTTPCache
+
+
+class FakeResponse:
+    def __init__(self, status_code, content=b'', etag=None):
+        self.status_code = status_code
+        self.content = content
+        self.encoding = 'utf-8'
+        self.headers = {'ETag': etag, 'Content-Type': 'text/html'} if etag else {}
+
+
+class FakeSession:
+    """Serves one page with an ETag, answering a matching If-None-Match with 304."""
+
+    def __init__(self, content, etag='"v1"'):
+        self.content = content
+        self.etag = etag
+        self.requests = []
+
+    def get(self, url, headers=None, timeout=None):
+        self.requests.append(dict(headers or {}))
+        if (headers or {}).get('If-None-Match') == self.etag:
+            return FakeResponse(304)
+        return FakeResponse(200, self.content, self.etag)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing last-use times, so LRU order does not depend on timer resolution
+    ticks = itertools.count(1)
+    monkeypatch.setattr(http_cache.time, 'time', lambda: float(next(ticks)))
+
+
+@pytest.fixture
+def site(tmp_path, monkeypatch):
+    session = FakeSession(b'<h2>Typhoon nears</h2>')
+    monkeypatch.setattr(fetcher, '_cache', HTTPCache(str(tmp_path)))
+    monkeypatch.setattr(fetcher, '_session', session)
+    monkeypatch.setattr(fetcher, '_offline', False)
+    return session
+
+
+def test_lru_eviction_keeps_recently_used_pages(tmp_path, clock):
+    body = os.urandom(1000)
+    cache = HTTPCache(str(tmp_path), max_bytes=2500)
+    cache.store('http://a', FakeResponse(200, body, '"a"'))
+    cache.store('http://b', FakeResponse(200, body, '"b"'))
+    assert cache.load('http://a') is not None
+    cache.store('http://c', FakeResponse(200, body, '"c"'))
+
+    assert cache.load('http://b') is None
+    assert cache.load('http://a').content == body
+    assert cache.conditional_headers('http://c') == {'If-None-Match': '"c"'}
+    assert not os.path.exists(cache._path('http://b', '.body.z'))
+
+
+def test_new_body_invalidates_parsed_articles(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    cache.store('http://a', FakeResponse(200, b'old', '"1"'))
+    cache.store_articles('http://a', 'parser', [{'headline': 'Old'}])
+    assert cache.load_articles('http://a', 'parser') == [{'headline': 'Old'}]
+    assert cache.load_articles('http://a', 'other') is None
+
+    cache.store('http://a', FakeResponse(200, b'new', '"2"'))
+    assert cache.load_articles('http://a', 'parser') is None
+
+
+def test_not_modified_page_reuses_parsed_articles(site):
+    calls = []
+
+    @fetcher.scraper('http://news.test/', key='test:1')
+    def scrape(response):
+        calls.append(response)
+        return [{'headline': response.content.decode()}]
+
+    first = scrape()
+    second = scrape()
+    assert first == second == [{'headline': '<h2>Typhoon nears</h2>'}]
+    assert len(calls) == 1
+    assert site.requests[1] == {'If-None-Match': '"v1"'}
+
+    # Parsing rules changed: the page is unchanged but must be parsed again
+    fetcher.scraper('http://news.test/', key='test:2')(scrape.__wrapped__)()
+    assert len(calls) == 2
+
+
+def test_offline_replays_cache_and_never_touches_network(site):
+    fetcher.fetch('http://news.test/')
+    fetcher.set_offline(True)
+    response = fetcher.fetch('http://news.test/')
+    assert response.from_cache and response.content == site.content
+    assert len(site.requests) == 1
+    with pytest.raises(fetcher.OfflineCacheMiss):
+        fetcher.fetch('http://other.test/')
+
+
+def test_processes_sharing_a_directory_keep_each_others_entries(tmp_path):
+    # Two caches stand in for the daemon and the GUI, each with its own index in memory
+    daemon = HTTPCache(str(tmp_path))
+    gui = HTTPCache(str(tmp_path))
+    daemon.store('http://a', FakeResponse(200, b'a', '"a"'))
+    gui.store('http://b', FakeResponse(200, b'b', '"b"'))
+    daemon.store_articles('http://a', 'parser', [{'headline': 'A'}])
+
+    reopened = HTTPCache(str(tmp_path))
+    assert reopened.load('http://a').content == b'a'
+    assert reopened.load('http://b').content == b'b'
+    assert reopened.load_articles('http://a', 'parser') == [{'headline': 'A'}]
+
+
+def test_orphaned_bodies_are_evicted(tmp_path):
+    cache = HTTPCache(str(tmp_path))
+    orphan = cache._path('http://lost', '.body.z')
+    with open(orphan, 'wb') as f:
+        f.write(os.urandom(1000))
+
+    cache.store('http://a', FakeResponse(200, b'a', '"a"'))
+    assert not os.path.exists(orphan)
+    assert os.path.exists(cache._path('http://a', '.body.z'))
@@ -0,0 +1,36 @@
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture(autouse=True)
+def clean():
+    instrumentation.reset()
+    yield
+    instrumentation.reset()
+
+
+def test_counters_are_exported_with_their_label_name():
+    instrumentation.count('bytes', 1024, site='www.bbc.com')
+    instrumentation.count('bytes', 512, site='www.bbc.com')
+    instrumentation.count('cache_hits', kind='page')
+    instrumentation.count('polls')
+
+    text = instrumentation.prometheus_text()
+    assert 'news_analyzer_bytes_total{site="www.bbc.com"} 1536' in text
+    assert 'news_analyzer_cache_hits_total{kind="page"} 1' in text
+    assert 'news_analyzer_polls_total 1' in text
+    assert 'label=' not in text
+    for metric in ('bytes', 'cache_hits', 'polls'):
+        assert f"# HELP news_analyzer_{metric}_total " in text
+        assert text.index(f"# HELP news_analyzer_{metric}_total") < text.index(f"# TYPE news_analyzer_{metric}_total")
+
+
+def test_totals_add_up_across_labels():
+    instrumentation.count('articles', 3, site='a')
+    instrumentation.count('articles', 4, site='b')
+    instrumentation.count('articles', 0, site='c')
+
+    snap = instrumentation.snapshot()
+    assert snap['counters'] == {'articles': 7}
+    assert snap['labels'] == {('articles', (('site', 'a'),)): 3, ('articles', (('site', 'b'),)): 4}
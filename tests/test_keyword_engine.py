@@ -0,0 +1,64 @@
+import random
+from collections import Counter
+
+import pytest
+
+from keyword_engine import KeywordCounter
+from text_processing import tokenize_article
+
+pytestmark = pytest.mark.usefixtures('plain_tokens')
+
+WORDS = ['typhoon', 'flood', 'senate', 'budget', 'peso', 'rice', 'storm', 'vote']
+
+
+def article(headline, summary=None, first_seen=None):
+    return {'headline': headline, 'summary': summary, 'first_seen': first_seen}
+
+
+def test_counts_every_article_like_freqdist():
+    articles = [
+        article('Typhoon nears'),
+        article('Typhoon nears'),
+        article('TYPHOON  nears', 'Flood warning'),
+    ]
+    counter = KeywordCounter()
+    assert counter.add_many(articles) == 3
+    assert counter.totals == Counter(token for a in articles for token in tokenize_article(a))
+    assert counter.top_k(2) == [('typhoon', 3), ('nears', 3)]
+    assert counter.totals['flood'] == 1
+
+
+def test_dedupe_skips_repeated_headlines():
+    counter = KeywordCounter(dedupe=True)
+    assert counter.add_many([article('Typhoon nears'), article('typhoon   NEARS', 'Flood warning')]) == 1
+    assert counter.totals == Counter({'typhoon': 1, 'nears': 1})
+
+
+def test_windows_match_a_brute_force_recount():
+    rng = random.Random(7)
+    counter = KeywordCounter(windows={'hour': 3600, 'day': 86400}, bucket_seconds=60)
+    added = []
+    now = 1_000_000.0
+    for _ in range(60):
+        # Articles arrive a little out of order, then the clock moves on
+        for _ in range(rng.randrange(0, 8)):
+            a = article(' '.join(rng.choices(WORDS, k=3)), first_seen=now - rng.uniform(0, 900))
+            counter.add(a)
+            added.append(a)
+        now += rng.uniform(0, 7200)
+
+        for name, seconds in counter.windows.items():
+            start = int((now - seconds) // 60) + 1
+            expected = Counter(token for a in added if int(a['first_seen'] // 60) >= start
+                               for token in tokenize_article(a))
+            assert counter.counts(name, now) == expected
+    assert counter.totals == Counter(token for a in added for token in tokenize_article(a))
+
+
+def test_expired_buckets_are_dropped():
+    counter = KeywordCounter(windows={'hour': 3600}, bucket_seconds=60)
+    counter.add(article('Old storm', first_seen=0))
+    counter.add(article('New storm', first_seen=10_000))
+    assert counter.counts('hour', 10_100) == Counter({'new': 1, 'storm': 1})
+    assert len(counter._buckets) == 1
+    assert counter.totals['old'] == 1
@@ -0,0 +1,17 @@
+import pytest
+
+from parse_backend import available_backends, parse_page
+
+HEADLINE = "Café — news"
+
+
+@pytest.mark.parametrize('backend', available_backends())
+@pytest.mark.parametrize('roots', [None, ['h2.title']])
+@pytest.mark.parametrize('page, encoding', [
+    ('<html><head><meta charset="windows-1252"></head><body>{}</body></html>', 'cp1252'),
+    ('<html><head><meta charset="utf-8"></head><body>{}</body></html>', 'utf-8'),
+    ('<html><body>{}</body></html>', 'utf-8'),
+])
+def test_pages_are_decoded_by_their_charset(backend, roots, page, encoding):
+    content = page.format(f'<h2 class="title"><a href="/story">{HEADLINE}</a></h2>').encode(encoding)
+    assert parse_page(content, roots, backend).find('a').get_text() == HEADLINE
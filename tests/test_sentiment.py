@@ -0,0 +1,48 @@
+import pytest
+
+import instrumentation
+import sentiment
+
+
+class FakeAnalyzer:
+    def __init__(self):
+        self.scored = []
+
+    def polarity_scores(self, text):
+        self.scored.append(text)
+        return {'compound': 0.5 if 'good' in text else 0.0}
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    fake = FakeAnalyzer()
+    monkeypatch.setattr(sentiment, '_analyzer', fake)
+    monkeypatch.setattr(sentiment, '_cache', sentiment.OrderedDict())
+    instrumentation.reset()
+    yield fake
+    instrumentation.reset()
+
+
+def cache_hits():
+    return instrumentation.snapshot()['counters'].get('cache_hits', 0)
+
+
+def test_only_cached_texts_count_as_hits(analyzer):
+    scores = sentiment.score_many(["good news", "No Summary", "No Summary"])
+    assert [s['compound'] for s in scores] == [0.5, 0.0, 0.0]
+    assert analyzer.scored == ["good news", "No Summary"]
+    assert cache_hits() == 0
+
+    sentiment.score_many(["No  Summary", "other"])
+    assert cache_hits() == 1
+
+
+def test_failed_scoring_counts_no_hits(analyzer, monkeypatch):
+    sentiment.score_many(["good news"])
+
+    def missing():
+        raise LookupError("no vader_lexicon")
+    monkeypatch.setattr(sentiment, 'get_analyzer', missing)
+    with pytest.raises(LookupError):
+        sentiment.score_many(["good news", "No Summary", "No Summary"])
+    assert cache_hits() == 0
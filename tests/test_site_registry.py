@@ -0,0 +1,65 @@
+import os
+import sys
+
+import pytest
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from fixtures import SCRAPER_FIXTURES, load_fixture, load_sites  # noqa: E402
+from parse_backend import available_backends, parse_page  # noqa: E402
+from site_registry import (child, compile_site, extract_articles, href_of, news_site,  # noqa: E402
+                           non_empty, rule, text_of)
+
+SITES = load_sites()
+
+
+def parse_modes(spec):
+    """(backend, targeted) pairs that can parse a site; selectolax only parses targeted."""
+    compiled = compile_site(spec)
+    return [(backend, targeted)
+            for backend in available_backends()
+            for targeted in (False, True)
+            if not (targeted and compiled[2] is None)]
+
+
+def assert_matches_full_parse(spec, content):
+    compiled = compile_site(spec)
+    expected = extract_articles(spec, BeautifulSoup(content, 'html.parser'), compiled)
+    assert expected
+    for backend, targeted in parse_modes(spec):
+        soup = parse_page(content, compiled[2] if targeted else None, backend)
+        assert extract_articles(spec, soup, compiled) == expected, (backend, targeted)
+
+
+@pytest.mark.parametrize('spec', SITES, ids=[spec['name'] for spec in SITES])
+def test_every_site_matches_a_full_html_parser_parse(spec):
+    assert_matches_full_parse(spec, load_fixture(SCRAPER_FIXTURES[spec['name']]))
+
+
+def test_nested_roots_yield_every_headline_once():
+    spec = news_site(
+        'scrape_nested',
+        "https://news.test",
+        rules=[rule(f'div.{class_name}', headline=child('a', text_of), link=child('a', href_of))
+               for class_name in ('article-title-h1', 'article-title-h4')],
+        keep=non_empty,
+    )
+    content = (
+        '<html><body>'
+        '<div class="article-title-h1"><a href="/lead">Lead story</a>'
+        '<div class="article-title-h4"><a href="/related">Related story</a></div></div>'
+        '<div class="article-title-h4"><a href="/other">Other story</a></div>'
+        '</body></html>'
+    ).encode('utf-8')
+
+    assert_matches_full_parse(spec, content)
+    articles = extract_articles(spec, parse_page(content, compile_site(spec)[2]), compile_site(spec))
+    assert [a['headline'] for a in articles] == ["Lead story", "Related story", "Other story"]
+
+
+def test_sibling_combinators_parse_the_whole_page():
+    spec = news_site('scrape_siblings', "https://news.test", rules=[rule('h2 + p')])
+    assert compile_site(spec)[2] is None
+    content = b'<html><body><h2>Section</h2><p>Story after a heading</p><p>Teaser</p></body></html>'
+    assert_matches_full_parse(spec, content)
@@ -0,0 +1,48 @@
+import pytest
+
+import story_clusters
+from story_clusters import MAX_BUCKET_SIZE, StoryClusterer
+
+REWORDED = [
+    ("Marcos signs 2025 national budget into law",
+     "Marcos signs P6.3-trillion 2025 national budget into law"),
+    ("China coast guard fires water cannon at PH vessel near Scarborough",
+     "PH vessel hit by China Coast Guard water cannon near Scarborough Shoal"),
+]
+
+
+@pytest.mark.parametrize('first, second', REWORDED)
+def test_reworded_headlines_share_a_story(first, second):
+    clusterer = StoryClusterer()
+    story = clusterer.add({'headline': first, 'source': 'inquirer'})
+    assert clusterer.add({'headline': second, 'source': 'philstar'}) == story
+    assert clusterer.stories()[0]['sources'] == ['inquirer', 'philstar']
+
+
+def test_unrelated_headlines_stay_apart():
+    clusterer = StoryClusterer()
+    headlines = [first for first, second in REWORDED] + [
+        "Senate approves rice tariff bill",
+        "Dengue cases up 20% in Metro Manila",
+    ]
+    stories = clusterer.add_many({'headline': h, 'source': 'bbc'} for h in headlines)
+    assert len(set(stories)) == len(headlines)
+
+
+def test_repeated_headlines_are_added_once():
+    clusterer = StoryClusterer()
+    story = clusterer.add({'headline': "Senate approves rice tariff bill", 'source': 'bbc'})
+    assert clusterer.add({'headline': "  senate approves RICE tariff bill ", 'source': 'rappler'}) == story
+    assert len(clusterer) == 1
+
+
+def test_buckets_keep_only_the_newest_candidates(monkeypatch):
+    # Every headline hashes to the same words, so they all land in the same buckets
+    monkeypatch.setattr(story_clusters, 'shingles', lambda headline: {1, 2, 3})
+    clusterer = StoryClusterer()
+    clusterer.add_many({'headline': f"story {i}", 'source': 'bbc'} for i in range(3 * MAX_BUCKET_SIZE))
+
+    for buckets in clusterer._buckets:
+        for bucket in buckets.values():
+            assert len(bucket) <= MAX_BUCKET_SIZE
+            assert bucket == list(range(2 * MAX_BUCKET_SIZE, 3 * MAX_BUCKET_SIZE))
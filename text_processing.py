@@ -0,0 +1,66 @@
+"""Shared text preprocessing for keyword extraction and word clouds."""
+from functools import lru_cache
+
+import instrumentation
+from nltk_resources import ensure
+
+# Number of distinct article texts whose tokens are remembered
+TOKEN_CACHE_SIZE = 100_000
+
+_stopwords = None
+_word_tokenize = None
+
+
+def get_stopwords():
+    """Return the English stopwords as a frozenset, loading the corpus only once."""
+    global _stopwords
+    if _stopwords is None:
+        ensure('stopwords')
+        from nltk.corpus import stopwords
+        _stopwords = frozenset(stopwords.words('english'))
+    return _stopwords
+
+
+def get_tokenizer():
+    """Return NLTK's word tokenizer, importing NLTK on first use."""
+    global _word_tokenize
+    if _word_tokenize is None:
+        ensure('punkt_tab')
+        from nltk.tokenize import word_tokenize
+        _word_tokenize = word_tokenize
+    return _word_tokenize
+
+
+def process_text(text):
+    """
+    Tokenizes and cleans up text by removing stopwords and non-alphabetic characters.
+    """
+    stop = get_stopwords()
+    return [word for word in get_tokenizer()(text.lower()) if word.isalpha() and word not in stop]
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def _tokenize_cached(text):
+    # Only texts not seen before reach here, so this times the real tokenizing
+    with instrumentation.timer('tokenize'):
+        return tuple(process_text(text))
+
+
+def article_text(article):
+    """Text of an article used for keywords: its headline and summary."""
+    return article['headline'] + ' ' + (article['summary'] or '')
+
+
+def tokenize_article(article):
+    """Return the cleaned tokens of one article, memoized by its text."""
+    return _tokenize_cached(article_text(article))
+
+
+def tokenize_many(articles):
+    """Return the cleaned tokens of each article, in order."""
+    return [tokenize_article(article) for article in articles]
+
+
+def all_tokens(articles):
+    """Return the cleaned tokens of all articles as one flat list."""
+    return [token for tokens in tokenize_many(articles) for token in tokens]